@@ -0,0 +1,183 @@
+"""Streaming statistics over replay archives.
+
+Archives are memory-mapped and split into chunks of whole replay records.
+Chunks are re-simulated in a process pool, and each one is reduced to a
+Summary whose size does not depend on how many games it covers.
+"""
+
+import os
+import sys
+import json
+import mmap
+import argparse
+import multiprocessing
+from collections import Counter
+from dataclasses import dataclass, field
+
+from engine import Engine
+from replay import DIRECTIONS, HEADER, ReplayError, read_replays
+
+CHUNK_SIZE = 64 * 1024 * 1024
+UNFINISHED = "unfinished"
+
+
+@dataclass
+class GameResult:
+    """How one game within a replay went."""
+
+    seed: int
+    score: int
+    ticks: int
+    cause: str
+
+
+@dataclass
+class Summary:
+    """Aggregated results of any number of games."""
+
+    games: int = 0
+    ticks: int = 0
+    scores: Counter = field(default_factory=Counter)
+    tick_buckets: Counter = field(default_factory=Counter)
+    causes: Counter = field(default_factory=Counter)
+    invalid_records: int = 0
+
+    def add(self, result: GameResult) -> None:
+        """Count one game."""
+        self.games += 1
+        self.ticks += result.ticks
+        self.scores[result.score] += 1
+        self.tick_buckets[1 << max(result.ticks - 1, 0).bit_length()] += 1
+        self.causes[result.cause] += 1
+
+    def merge(self, other: "Summary") -> None:
+        """Count every game of another summary."""
+        self.games += other.games
+        self.ticks += other.ticks
+        self.scores.update(other.scores)
+        self.tick_buckets.update(other.tick_buckets)
+        self.causes.update(other.causes)
+        self.invalid_records += other.invalid_records
+
+    def to_dict(self) -> dict:
+        return {
+            "games": self.games,
+            "ticks": self.ticks,
+            "mean_ticks": self.ticks / self.games if self.games else 0.0,
+            "scores": dict(sorted(self.scores.items())),
+            "ticks_up_to": dict(sorted(self.tick_buckets.items())),
+            "causes": dict(self.causes),
+            "invalid_records": self.invalid_records,
+        }
+
+
+def simulate(replay):
+    """Re-simulate replay, yielding the result of each game it contains.
+
+    The game still running when the recording stopped is reported with the
+    cause UNFINISHED.
+    """
+    engine = Engine(replay.seed, columns=replay.columns, rows=replay.rows)
+    ticks = 0
+    for code in replay.ticks:
+        engine.direction = DIRECTIONS[code]
+        score = len(engine.snake) - 1
+        ticks += 1
+        cause = engine.update()
+        if cause is not None:
+            yield GameResult(replay.seed, score, ticks, cause)
+            ticks = 0
+    if ticks:
+        yield GameResult(replay.seed, len(engine.snake) - 1, ticks, UNFINISHED)
+
+
+def chunks(path: str, chunk_size: int = CHUNK_SIZE):
+    """Yield (path, start, stop) byte ranges of whole records in an archive.
+
+    Only record headers are read, so this is cheap even for huge archives.
+    """
+    size = os.path.getsize(path)
+    if not size:
+        return
+    with open(path, "rb") as archive:
+        with mmap.mmap(archive.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            start = offset = 0
+            while offset < size:
+                if size - offset < HEADER.size:
+                    raise ReplayError(f"truncated replay header at byte {offset}")
+                offset += HEADER.size + HEADER.unpack_from(mapped, offset)[-1]
+                if offset - start >= chunk_size:
+                    yield (path, start, offset)
+                    start = offset
+            if start < offset:
+                yield (path, start, offset)
+
+
+def iter_replays(path: str, start: int = 0, stop: int = None):
+    """Yield the replays stored between two offsets of a memory-mapped archive.
+
+    None is yielded in place of each malformed record, so the records after
+    it are still read.
+    """
+    size = os.path.getsize(path)
+    if not size:
+        return
+    stop = size if stop is None else stop
+    with open(path, "rb") as archive:
+        with mmap.mmap(archive.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            view = memoryview(mapped)
+            try:
+                offset = start
+                while offset < stop:
+                    if stop - offset < HEADER.size:
+                        yield None
+                        return
+                    end = offset + HEADER.size + HEADER.unpack_from(view, offset)[-1]
+                    try:
+                        (replay,) = read_replays(view[offset : min(end, stop)])
+                    except ReplayError:
+                        replay = None
+                    yield replay
+                    offset = end
+            finally:
+                view.release()
+
+
+def summarize_chunk(chunk: tuple) -> Summary:
+    """Re-simulate every replay in a chunk and summarize its games.
+
+    Malformed records are counted and skipped.
+    """
+    summary = Summary()
+    for replay in iter_replays(*chunk):
+        if replay is None:
+            summary.invalid_records += 1
+            continue
+        for result in simulate(replay):
+            summary.add(result)
+    return summary
+
+
+def summarize(paths, processes: int = None, chunk_size: int = CHUNK_SIZE) -> Summary:
+    """Summarize every game in the archives at paths using a process pool."""
+    summary = Summary()
+    all_chunks = (chunk for path in paths for chunk in chunks(path, chunk_size))
+    with multiprocessing.Pool(processes) as pool:
+        for chunk_summary in pool.imap_unordered(summarize_chunk, all_chunks):
+            summary.merge(chunk_summary)
+    return summary
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("paths", nargs="+")
+    parser.add_argument("--processes", type=int, default=None)
+    args = parser.parse_args()
+
+    summary = summarize(args.paths, args.processes)
+    json.dump(summary.to_dict(), sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,301 @@
+"""Steers an Engine to its extenders without running into anything.
+
+Two strategies are available:
+
+GREEDY follows the shortest path to the extender, as long as the head could
+still reach the tail after eating it. On a board with a HAMILTONIAN cycle,
+safe means the body would still lie along the cycle one way round or the
+other, and when there is no safe path it follows the cycle that way, so it
+always fills the board. Elsewhere it chases its own tail until a safe path
+opens up, with no fallback if none does: on a 5 by 5 board it can circle at
+length 14 forever, and it can be trapped when an extender appears on the way
+to its tail. Paths are searched knowing that each segment leaves its cell
+after as many ticks as there are segments behind it, so a path stays valid
+until the extender is eaten and is only searched for once per extender.
+
+HAMILTONIAN follows a cycle through every cell of the board, taking
+shortcuts that cannot trap the snake. It always fills the board, but needs
+an even number of columns or rows and at least two of each.
+"""
+
+from array import array
+from collections import deque
+from functools import lru_cache
+
+from engine import DOWN, LEFT, MOVE_AMOUNTS, RIGHT, UP
+
+GREEDY = "greedy"
+HAMILTONIAN = "hamiltonian"
+DIRECTIONS = (UP, DOWN, LEFT, RIGHT)
+
+
+@lru_cache(maxsize=8)
+def hamiltonian_cycle(columns: int, rows: int) -> tuple:
+    """Return the cells of a cycle visiting every cell, and each cells position.
+
+    The cycle runs along the first row, zigzags back over the rest of the
+    board leaving out the first column, and returns up the first column.
+    Return None if the board has no such cycle.
+    """
+    if rows % 2 == 0 and columns > 1:
+        width, height, transposed = columns, rows, False
+    elif columns % 2 == 0 and rows > 1:
+        width, height, transposed = rows, columns, True
+    else:
+        return None
+    path = [(x, 0) for x in range(width)]
+    for y in range(1, height):
+        xs = range(width - 1, 0, -1) if y % 2 else range(1, width)
+        path.extend((x, y) for x in xs)
+    path.extend((0, y) for y in range(height - 1, 0, -1))
+    if transposed:
+        path = [(y, x) for x, y in path]
+    order = array("i", (row * columns + column for column, row in path))
+    positions = array("i", bytes(4 * len(order)))
+    for position, index in enumerate(order):
+        positions[index] = position
+    return order, positions
+
+
+@lru_cache(maxsize=8)
+def neighbour_table(columns: int, rows: int) -> tuple:
+    """Return the indexes of the cells next to each cell of a board."""
+    table = []
+    for index in range(columns * rows):
+        column, row = index % columns, index // columns
+        cells = []
+        if row > 0:
+            cells.append(index - columns)
+        if row < rows - 1:
+            cells.append(index + columns)
+        if column > 0:
+            cells.append(index - 1)
+        if column < columns - 1:
+            cells.append(index + 1)
+        table.append(tuple(cells))
+    return tuple(table)
+
+
+class Autopilot:
+    """Chooses the direction an engine should move in each tick."""
+
+    def __init__(self, engine, strategy: str = GREEDY):
+        self.engine = engine
+        self.strategy = strategy
+        self.cycle = hamiltonian_cycle(engine.columns, engine.rows)
+        self.cycles = ()
+        if self.cycle is not None:
+            order, positions = self.cycle
+            size = len(order)
+            backwards = (
+                order[::-1],
+                array("i", (size - 1 - position for position in positions)),
+            )
+            self.cycles = (self.cycle, backwards)
+        if strategy == HAMILTONIAN:
+            if self.cycle is None:
+                raise ValueError(
+                    "a board needs an even number of columns or rows, and at "
+                    "least two of each, to have a cycle"
+                )
+        elif strategy != GREEDY:
+            raise ValueError(f"unknown strategy {strategy!r}")
+        self.neighbours = neighbour_table(engine.columns, engine.rows)
+        self.following = self.cycle
+        self.plan = deque()
+        self.planned_for = None
+        self.expected = None
+
+    def choose(self) -> str:
+        """Return the direction to move in next, or None if every way is blocked."""
+        engine = self.engine
+        head = engine.cell_index(engine.snake[0])
+        if self.strategy == HAMILTONIAN:
+            cell = self._follow_cycle(head, self.cycle)
+        else:
+            cell = self._follow_plan(head)
+        if cell is None:
+            return None
+        return self._direction(head, cell)
+
+    def _follow_cycle(self, head: int, cycle: tuple) -> int:
+        engine = self.engine
+        order, positions = cycle
+        size = len(order)
+        head_position = positions[head]
+        if len(engine.snake) > 1:
+            gap = (
+                positions[engine.cell_index(engine.snake[-1])] - head_position
+            ) % size
+        else:
+            # A lone head must not land just before the cell it left, as the
+            # next cell along the cycle would then be a reversal.
+            gap = size - 1
+        if engine.extender is not None:
+            food = (
+                positions[engine.cell_index(engine.extender)] - head_position
+            ) % size
+        else:
+            food = size
+        # The body lies in cycle order behind the head, so every cell between
+        # the head and the tail along the cycle is free. Jumping to one keeps
+        # that true, and never jumping past the extender means it gets eaten.
+        reversal = self._behind([head]) if len(engine.snake) == 1 else None
+        best = order[(head_position + 1) % size]
+        best_distance = 1
+        for cell in self.neighbours[head]:
+            distance = (positions[cell] - head_position) % size
+            if (
+                best_distance < distance < gap
+                and distance <= food
+                and cell not in engine.occupancy
+                and cell != reversal
+            ):
+                best, best_distance = cell, distance
+        return best
+
+    def _follow_plan(self, head: int) -> int:
+        engine = self.engine
+        if (
+            not self.plan
+            or self.planned_for != engine.extender
+            or self.expected != (head, len(engine.snake))
+            or not self._enterable(self.plan[0])
+        ):
+            self.plan = self._make_plan()
+            self.planned_for = engine.extender
+        if not self.plan:
+            return None
+        cell = self.plan.popleft()
+        self.expected = (cell, len(engine.snake))
+        return cell
+
+    def _make_plan(self) -> deque:
+        """Return the cells to move through, nearest first.
+
+        A safe path to the extender stays safe to follow until its end. A
+        step along a cycle, towards the tail, or into any open cell, is only
+        good for one tick, as a new extender may open up a path, and reaching
+        where the tail was does not mean it can still be followed.
+        """
+        engine = self.engine
+        body = [engine.cell_index(location) for location in engine.snake]
+        own = set(body)
+        if engine.extender is not None:
+            path = self._search(body, engine.cell_index(engine.extender), own)
+            if path is not None:
+                grown = (path[::-1] + body)[: len(body) + 1]
+                if len(grown) == engine.columns * engine.rows or self._safe(grown, own):
+                    return deque(path)
+        # Keep to the direction already followed, as shortcuts that save
+        # ticks one way round can lose them the other way.
+        for cycle in sorted(self.cycles, key=lambda cycle: cycle is not self.following):
+            if self._behind_on_cycle(body, cycle):
+                self.following = cycle
+                return deque((self._follow_cycle(body[0], cycle),))
+        if len(body) > 1:
+            path = self._search(body, body[-1], own, engine.extender)
+            if path is not None:
+                return deque(path[:1])
+        for cell in self.neighbours[body[0]]:
+            if self._enterable(cell) and cell != self._behind(body):
+                return deque((cell,))
+        return deque()
+
+    def _search(self, body: list, goal: int, own: set, avoid: tuple = None) -> list:
+        """Return the shortest list of cells taking the head of body to goal.
+
+        Body is a list of cell indexes, head first. Covered cells outside
+        own, the cells of the engines snake, belong to other snakes and are
+        never entered, and neither is the location avoid. Return None if the
+        head cannot get there.
+        """
+        occupancy = self.engine.occupancy
+        neighbours = self.neighbours
+        previous = {body[0]: None}
+        if avoid is not None:
+            previous[self.engine.cell_index(avoid)] = None
+        length = len(body)
+        free_after = {cell: length - position for position, cell in enumerate(body)}
+        reversal = self._behind(body)
+        frontier = [body[0]]
+        depth = 0
+        while frontier:
+            depth += 1
+            next_frontier = []
+            for cell in frontier:
+                for neighbour in neighbours[cell]:
+                    if neighbour in previous:
+                        continue
+                    if depth == 1 and neighbour == reversal:
+                        continue
+                    if neighbour in free_after:
+                        if free_after[neighbour] > depth:
+                            continue
+                    elif neighbour in occupancy and neighbour not in own:
+                        continue
+                    previous[neighbour] = cell
+                    if neighbour == goal:
+                        path = []
+                        while neighbour != body[0]:
+                            path.append(neighbour)
+                            neighbour = previous[neighbour]
+                        return path[::-1]
+                    next_frontier.append(neighbour)
+            frontier = next_frontier
+        return None
+
+    def _safe(self, body: list, own: set) -> bool:
+        """Return whether the head of body could follow its tail forever.
+
+        On a board with a cycle, that means the body lies along one of its
+        directions, so the snake can always fall back to following it.
+        Otherwise it means the head can reach the tail.
+        """
+        if self.cycles:
+            return any(self._behind_on_cycle(body, cycle) for cycle in self.cycles)
+        return self._search(body, body[-1], own) is not None
+
+    def _behind_on_cycle(self, body: list, cycle: tuple) -> bool:
+        """Return whether body runs forwards along cycle from its tail to its head.
+
+        Each segment is then further along the cycle than the one behind it,
+        without going round more than once. While that holds, following the
+        cycle can never run into the body, as long as the next cell along it
+        is not the one the head just left.
+        """
+        order, positions = cycle
+        size = len(order)
+        head_position = positions[body[0]]
+        if order[(head_position + 1) % size] == self._behind(body):
+            return False
+        covered = 0
+        for ahead, behind in zip(body, body[1:]):
+            covered += (positions[ahead] - positions[behind]) % size
+        return covered == (head_position - positions[body[-1]]) % size
+
+    def _behind(self, body: list) -> int:
+        """Return the cell the head of body cannot turn back into."""
+        if len(body) > 1:
+            return body[1]
+        if self.engine.direction is None:
+            return None
+        move_amount = MOVE_AMOUNTS[self.engine.direction]
+        column, row = self.engine.cell_location(body[0])
+        return self.engine.cell_index((column - move_amount[0], row - move_amount[1]))
+
+    def _enterable(self, index: int) -> bool:
+        """Return whether the head could move into a cell next tick."""
+        engine = self.engine
+        return index not in engine.occupancy or (
+            len(engine.snake) > 1 and index == engine.cell_index(engine.snake[-1])
+        )
+
+    def _direction(self, head: int, cell: int) -> str:
+        column, row = self.engine.cell_location(head)
+        step = self.engine.cell_location(cell)
+        for direction in DIRECTIONS:
+            move_amount = MOVE_AMOUNTS[direction]
+            if (column + move_amount[0], row + move_amount[1]) == step:
+                return direction
+        raise ValueError("cell is not next to the head")
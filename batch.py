@@ -0,0 +1,123 @@
+"""Steps many independent Snake games at once with NumPy.
+
+Every board is stored as a row of cell lifetimes: the number of ticks until
+the segment covering that cell moves off it, or zero for an empty cell. Moving
+a snake is then a single subtraction over all boards, and growing is skipping
+that subtraction for the boards whose snake reached its extender.
+"""
+
+import numpy as np
+
+from engine import COLUMNS, DOWN, LEFT, RIGHT, ROWS, UP
+
+NO_ACTION = -1
+DIRECTIONS = (UP, DOWN, LEFT, RIGHT)
+EMPTY = 0
+BODY = 1
+HEAD = 2
+EXTENDER = 3
+_ROW_MOVES = np.array([-1, 1, 0, 0])
+_COLUMN_MOVES = np.array([0, 0, -1, 1])
+_OPPOSITE_ACTIONS = np.array([1, 0, 3, 2])
+
+
+class BatchEngine:
+    """Contains the Engine rules for a batch of games held in arrays.
+
+    Actions are indexes into DIRECTIONS, or NO_ACTION to keep going the same
+    way. A game that ends is reset in the same step, so the observation
+    returned for it is the start of its next game.
+    """
+
+    def __init__(
+        self, num_games: int, columns: int = COLUMNS, rows: int = ROWS, seed=None
+    ):
+        self.num_games = num_games
+        self.columns = columns
+        self.rows = rows
+        self.start_row = rows // 2
+        self.start_column = columns // 2
+        self.rng = np.random.default_rng(seed)
+        self.lifetimes = np.zeros((num_games, rows * columns), dtype=np.int32)
+        self.head_rows = np.empty(num_games, dtype=np.int64)
+        self.head_columns = np.empty(num_games, dtype=np.int64)
+        self.lengths = np.empty(num_games, dtype=np.int32)
+        self.directions = np.empty(num_games, dtype=np.int8)
+        self.extenders = np.empty(num_games, dtype=np.int64)
+        self._games = np.arange(num_games)
+        self.reset(np.ones(num_games, dtype=bool))
+
+    def reset(self, mask: np.ndarray) -> None:
+        """Put the snakes of the masked games back at the start location."""
+        self.lifetimes[mask] = 0
+        self.head_rows[mask] = self.start_row
+        self.head_columns[mask] = self.start_column
+        self.lengths[mask] = 1
+        self.directions[mask] = NO_ACTION
+        self.extenders[mask] = -1
+        start = self.start_row * self.columns + self.start_column
+        self.lifetimes[mask, start] = 1
+
+    def step(self, actions) -> tuple:
+        """Advance every game by one tick.
+
+        Return the observations, the rewards (1 for reaching an extender, -1
+        for a game over, otherwise 0) and which games ended.
+        """
+        actions = np.asarray(actions, dtype=np.int8)
+        turning = (actions != NO_ACTION) & (
+            (self.directions == NO_ACTION)
+            | (actions != _OPPOSITE_ACTIONS[self.directions])
+        )
+        self.directions[turning] = actions[turning]
+
+        moving = self.directions != NO_ACTION
+        directions = np.where(moving, self.directions, 0)
+        rows = self.head_rows + np.where(moving, _ROW_MOVES[directions], 0)
+        columns = self.head_columns + np.where(moving, _COLUMN_MOVES[directions], 0)
+        out_of_bounds = (
+            (rows < 0) | (rows >= self.rows) | (columns < 0) | (columns >= self.columns)
+        )
+        heads = np.where(out_of_bounds, 0, rows * self.columns + columns)
+
+        spawning = self.extenders < 0
+        eating = moving & ~out_of_bounds & ~spawning & (heads == self.extenders)
+        shrinking = moving & ~eating
+        self.lifetimes[shrinking] -= 1
+        np.maximum(self.lifetimes, 0, out=self.lifetimes)
+
+        collided = moving & ~out_of_bounds & (self.lifetimes[self._games, heads] > 0)
+        self.lengths += eating
+        in_bounds = ~out_of_bounds
+        self.lifetimes[self._games[in_bounds], heads[in_bounds]] = self.lengths[
+            in_bounds
+        ]
+        self.head_rows = rows
+        self.head_columns = columns
+        self.extenders[eating] = -1
+        self._spawn_extenders(spawning & in_bounds)
+
+        dones = out_of_bounds | collided
+        rewards = np.where(dones, -1.0, eating.astype(np.float64))
+        self.reset(dones)
+        return self.observations(), rewards, dones
+
+    def observations(self) -> np.ndarray:
+        """Return every board as rows of EMPTY, BODY, HEAD and EXTENDER cells."""
+        boards = (self.lifetimes > 0).astype(np.int8)
+        heads = self.head_rows * self.columns + self.head_columns
+        boards[self._games, heads] = HEAD
+        placed = self.extenders >= 0
+        boards[self._games[placed], self.extenders[placed]] = EXTENDER
+        return boards.reshape(self.num_games, self.rows, self.columns)
+
+    def _spawn_extenders(self, mask: np.ndarray) -> None:
+        """Place an extender on a random free cell of each masked game."""
+        games = self._games[mask]
+        if not len(games):
+            return
+        scores = self.rng.random((len(games), self.rows * self.columns))
+        scores[self.lifetimes[games] > 0] = -1.0
+        cells = scores.argmax(axis=1)
+        full = scores[np.arange(len(games)), cells] < 0
+        self.extenders[games] = np.where(full, -1, cells)
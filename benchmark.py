@@ -0,0 +1,377 @@
+"""Benchmarks of the per-tick hot paths.
+
+    python benchmark.py run --output results.json
+    python benchmark.py compare before.json after.json
+    python benchmark.py boards
+    python benchmark.py startup
+    python benchmark.py memory
+
+run times Game.update, Engine.move_snake, the self collision check, extender
+spawns and rendering for snakes from one segment up to a full board, on
+several board sizes, and writes the results as JSON. Each snake lies along a
+cycle through every cell and follows it, so it moves forever without growing
+or dying. compare reports how each benchmark changed between two result
+files and fails if any got slower than the tolerance allows.
+
+boards measures how ticks, spawns and engine memory grow with the size of
+the board, using a snake of length 8 circling a 3 by 3 block.
+
+startup measures, in fresh interpreters, how long importing the rules and
+the game takes and how long it takes from nothing to the first frame drawn.
+
+memory measures the bytes each game takes, for snakes from one segment up to
+a full board.
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import timeit
+import argparse
+import platform
+import subprocess
+import tracemalloc
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+
+from autopilot import hamiltonian_cycle
+from engine import DOWN, LEFT, MOVE_AMOUNTS, RIGHT, UP, Engine
+from game import Game
+
+BOARD_SIZES = ((20, 15), (100, 100), (1000, 1000), (10_000, 10_000))
+SUITE_BOARD_SIZES = ((20, 15), (40, 30), (80, 60))
+SNAKE_FRACTIONS = (0, 0.1, 0.5, 1)
+LOOP_DIRECTIONS = (RIGHT, RIGHT, DOWN, DOWN, LEFT, LEFT, UP, UP)
+TOLERANCE = 0.1
+STARTUP_STATEMENTS = {
+    "import_engine": "import engine",
+    "import_game": "import game",
+    "first_frame": "import game; game.Game().render()",
+}
+
+
+def looping_engine(columns: int, rows: int) -> tuple:
+    """Return an engine whose snake fills a loop, and the turn for each cell."""
+    location = (columns // 2 - 1, rows // 2 - 1)
+    turns = {}
+    for direction in LOOP_DIRECTIONS:
+        turns[location] = direction
+        move_amount = MOVE_AMOUNTS[direction]
+        location = (location[0] + move_amount[0], location[1] + move_amount[1])
+    engine = Engine(0, columns=columns, rows=rows)
+    engine.set_snake(reversed(list(turns)))
+    engine.extender = (0, 0)
+    return engine, turns
+
+
+def measure_board(columns: int, rows: int, ticks: int) -> dict:
+    """Return the cost per tick, per spawn and in memory of one board size.
+
+    The tables shared by every engine on a board of the same size are made
+    before memory is traced, so only the engine's own memory is counted.
+    """
+    Engine(0, columns=columns, rows=rows)
+    tracemalloc.start()
+    engine, turns = looping_engine(columns, rows)
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    began = time.perf_counter()
+    for _ in range(ticks):
+        engine.direction = turns[engine.snake[0]]
+        engine.update()
+    tick_seconds = (time.perf_counter() - began) / ticks
+
+    rng = random.Random(0)
+    random_free = engine.occupancy.random_free
+    began = time.perf_counter()
+    for _ in range(ticks):
+        random_free(rng)
+    spawn_seconds = (time.perf_counter() - began) / ticks
+
+    return {
+        "columns": columns,
+        "rows": rows,
+        "tick_us": tick_seconds * 1e6,
+        "spawn_us": spawn_seconds * 1e6,
+        "memory_bytes": memory,
+    }
+
+
+def game_memory(columns: int, rows: int, length: int, games: int) -> float:
+    """Return the mean bytes taken by each of games engines with a snake of length.
+
+    Each snake is laid from freshly made locations, as it would be when read
+    from a replay or a message, so none are shared with the caller.
+    """
+    order, _ = hamiltonian_cycle(columns, rows)
+    Engine(0, columns=columns, rows=rows)
+    tracemalloc.start()
+    sessions = []
+    for seed in range(games):
+        session = Engine(seed, columns=columns, rows=rows)
+        session.set_snake(
+            [(index % columns, index // columns) for index in order[length - 1 :: -1]]
+        )
+        sessions.append(session)
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return memory / games
+
+
+def snake_lengths(columns: int, rows: int) -> list:
+    """Return the snake lengths to benchmark on a board, from 1 to full."""
+    cells = columns * rows
+    return sorted({max(1, round(cells * fraction)) for fraction in SNAKE_FRACTIONS})
+
+
+def lay_along_cycle(engine: Engine, length: int):
+    """Lay a snake of length along a cycle through the board.
+
+    Return a function that prepares the engine for its next tick: it points
+    the snake along the cycle and puts the extender just behind the tail,
+    the one free cell the snake cannot reach for a whole lap.
+    """
+    order, _ = hamiltonian_cycle(engine.columns, engine.rows)
+    locations = [engine.cell_location(index) for index in order]
+    following = dict(zip(locations, locations[1:] + locations[:1]))
+    turns = {}
+    for location, next_location in following.items():
+        step = (next_location[0] - location[0], next_location[1] - location[1])
+        turns[location] = next(
+            direction for direction in MOVE_AMOUNTS if MOVE_AMOUNTS[direction] == step
+        )
+    behind = {next_location: location for location, next_location in following.items()}
+    engine.set_snake(reversed(locations[:length]))
+    full = length == len(locations)
+    snake = engine.snake
+
+    def prepare() -> None:
+        engine.direction = turns[snake[0]]
+        engine.extender = None if full else behind[snake[-1]]
+
+    prepare()
+    return prepare
+
+
+def time_call(operation, repeat: int) -> float:
+    """Return the fastest seconds per call of operation over repeat runs."""
+    timer = timeit.Timer(operation)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat, number)) / number
+
+
+def time_after_setup(setup, operation, calls: int, repeat: int) -> float:
+    """Return the fastest mean seconds per call of operation, leaving out setup."""
+    best = float("inf")
+    for _ in range(repeat):
+        total = 0.0
+        for _ in range(calls):
+            setup()
+            began = time.perf_counter()
+            operation()
+            total += time.perf_counter() - began
+        best = min(best, total / calls)
+    return best
+
+
+def benchmark_state(columns: int, rows: int, length: int, repeat: int) -> dict:
+    """Return the seconds per call of every hot path for one snake and board."""
+    game = Game(0, columns=columns, rows=rows)
+    engine = game.engine
+    prepare = lay_along_cycle(engine, length)
+    results = {}
+
+    def update():
+        prepare()
+        game.update()
+
+    results["game_update"] = time_call(update, repeat)
+    game.vacated_since_render.clear()
+    game.ticks_since_render = 0
+
+    def move():
+        prepare()
+        engine.move_snake()
+
+    results["move_snake"] = time_call(move, repeat)
+    results["collided_with_self"] = time_call(
+        engine.head_segment_collided_with_self, repeat
+    )
+    random_free = engine.occupancy.random_free
+    rng = random.Random(0)
+    results["spawn"] = time_call(lambda: random_free(rng), repeat)
+
+    game.full_redraw = True
+    game.render()
+    calls = 200
+    results["render"] = time_after_setup(update, game.render, calls, repeat)
+
+    def redraw_everything():
+        game.full_redraw = True
+        game.render()
+
+    results["render_full"] = time_after_setup(
+        prepare, redraw_everything, max(calls // 10, 1), repeat
+    )
+    pygame.display.quit()
+    return results
+
+
+def time_startup(statement: str, repeat: int) -> float:
+    """Return the fastest seconds a fresh interpreter takes to run statement.
+
+    The interpreter's own startup is left out.
+    """
+    program = (
+        "import time\n"
+        "began = time.perf_counter()\n"
+        f"{statement}\n"
+        "print(time.perf_counter() - began)"
+    )
+    best = float("inf")
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", program],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout
+        best = min(best, float(output.split()[-1]))
+    return best
+
+
+def run_suite(board_sizes=SUITE_BOARD_SIZES, repeat: int = 3) -> dict:
+    """Run every benchmark and return the results with where they came from."""
+    results = []
+    for columns, rows in board_sizes:
+        for length in snake_lengths(columns, rows):
+            state = benchmark_state(columns, rows, length, repeat)
+            for name, seconds in state.items():
+                results.append(
+                    {
+                        "name": name,
+                        "columns": columns,
+                        "rows": rows,
+                        "length": length,
+                        "seconds": seconds,
+                    }
+                )
+    return {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "pygame": pygame.version.ver,
+        "machine": platform.machine(),
+        "results": results,
+    }
+
+
+def git_commit() -> str:
+    """Return the commit of the working tree, or None outside a git checkout."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def result_key(result: dict) -> tuple:
+    return (result["name"], result["columns"], result["rows"], result["length"])
+
+
+def compare(before: dict, after: dict, tolerance: float = TOLERANCE) -> list:
+    """Return (key, before, after, ratio, regressed) for every shared benchmark."""
+    earlier = {result_key(result): result["seconds"] for result in before["results"]}
+    changes = []
+    for result in after["results"]:
+        key = result_key(result)
+        if key in earlier:
+            ratio = result["seconds"] / earlier[key]
+            changes.append(
+                (key, earlier[key], result["seconds"], ratio, ratio > 1 + tolerance)
+            )
+    return changes
+
+
+def print_results(results: dict) -> None:
+    print(f"{'benchmark':<20} {'board':>7} {'length':>6} {'time':>10}")
+    for result in results["results"]:
+        board = f"{result['columns']}x{result['rows']}"
+        print(
+            f"{result['name']:<20} {board:>7} {result['length']:>6} "
+            f"{result['seconds'] * 1e6:>8.2f}us"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    run_parser = commands.add_parser("run", help="run the benchmark suite")
+    run_parser.add_argument("--output", help="write the results to this JSON file")
+    run_parser.add_argument("--repeat", type=int, default=3)
+    compare_parser = commands.add_parser("compare", help="compare two result files")
+    compare_parser.add_argument("before")
+    compare_parser.add_argument("after")
+    compare_parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    boards_parser = commands.add_parser("boards", help="measure board size scaling")
+    boards_parser.add_argument("--ticks", type=int, default=100_000)
+    startup_parser = commands.add_parser("startup", help="measure cold start")
+    startup_parser.add_argument("--repeat", type=int, default=5)
+    memory_parser = commands.add_parser("memory", help="measure bytes per game")
+    memory_parser.add_argument("--games", type=int, default=1000)
+    args = parser.parse_args()
+
+    if args.command == "run":
+        results = run_suite(repeat=args.repeat)
+        print_results(results)
+        if args.output:
+            with open(args.output, "w") as output:
+                json.dump(results, output, indent=2)
+    elif args.command == "compare":
+        with open(args.before) as before, open(args.after) as after:
+            changes = compare(json.load(before), json.load(after), args.tolerance)
+        for key, earlier, later, ratio, regressed in changes:
+            name, columns, rows, length = key
+            board = f"{columns}x{rows}"
+            print(
+                f"{name:<20} {board:>7} {length:>6} "
+                f"{earlier * 1e6:>8.2f}us -> {later * 1e6:>8.2f}us "
+                f"{ratio:>5.2f}x{'  SLOWER' if regressed else ''}"
+            )
+        if any(change[-1] for change in changes):
+            sys.exit(1)
+    elif args.command == "startup":
+        for name, statement in STARTUP_STATEMENTS.items():
+            seconds = time_startup(statement, args.repeat)
+            print(f"{name:<20} {seconds * 1000:>8.2f}ms")
+    elif args.command == "memory":
+        print(f"{'board':>7} {'length':>6} {'per game':>10}")
+        for columns, rows in SUITE_BOARD_SIZES:
+            for length in snake_lengths(columns, rows):
+                memory = game_memory(columns, rows, length, args.games)
+                board = f"{columns}x{rows}"
+                print(f"{board:>7} {length:>6} {memory:>9,.0f}B")
+    else:
+        print(f"{'board':>13} {'tick':>9} {'spawn':>9} {'memory':>12}")
+        for columns, rows in BOARD_SIZES:
+            result = measure_board(columns, rows, args.ticks)
+            print(
+                f"{columns:>6}x{rows:<6} {result['tick_us']:>7.2f}us "
+                f"{result['spawn_us']:>7.2f}us {result['memory_bytes']:>10,}B"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,319 @@
+"""Snake rules, independent of pygame and the display."""
+
+import random
+from array import array
+from collections import deque
+from dataclasses import dataclass
+from functools import lru_cache
+
+from occupancy import DENSE_LIMIT, make_occupancy
+
+COLUMNS = 20
+ROWS = 15
+MAX_BOARD_SIZE = 10_000
+FPS = 10
+UP = "up"
+DOWN = "down"
+LEFT = "left"
+RIGHT = "right"
+COLLIDED_WITH_SELF = "collided with self"
+OUT_OF_BOUNDS = "out of bounds"
+OPPOSITE_DIRECTIONS = {UP: DOWN, DOWN: UP, LEFT: RIGHT, RIGHT: LEFT}
+MOVE_AMOUNTS = {UP: (0, -1), DOWN: (0, 1), LEFT: (-1, 0), RIGHT: (1, 0)}
+
+
+@lru_cache(maxsize=8)
+def _locations(columns: int, rows: int) -> tuple:
+    return tuple((index % columns, index // columns) for index in range(columns * rows))
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    """Everything needed to put an Engine back the way it was.
+
+    The snake is kept as the bytes of an array of cell indexes, head first,
+    and the occupancy as whatever its save method returned.
+    """
+
+    columns: int
+    rows: int
+    seed: int
+    start_location: tuple
+    direction: str
+    extender: tuple
+    vacated: tuple
+    cells: bytes
+    rng_state: tuple
+    occupancy_state: tuple
+
+
+class Engine:
+    """Contains all game rules.
+
+    The board is columns by rows cells, and locations are (column, row)
+    tuples. The snake starts in start_location, or the middle of the board.
+
+    Extenders are placed using a random generator seeded with seed, so a game
+    is reproduced by its seed and the direction the snake moved each tick.
+
+    Several engines can share one occupancy to put their snakes on the same
+    board, in which case running into another snake counts as colliding with
+    self.
+
+    Locations on boards of up to DENSE_LIMIT cells are shared tuples, one per
+    cell, used by every engine on a board of that size, so a segment costs
+    no more than the reference to its location.
+    """
+
+    __slots__ = (
+        "columns",
+        "rows",
+        "seed",
+        "rng",
+        "start_location",
+        "direction",
+        "extender",
+        "vacated",
+        "occupancy",
+        "shares_occupancy",
+        "locations",
+        "snake",
+    )
+
+    def __init__(
+        self,
+        seed: int = None,
+        occupancy=None,
+        start_location: tuple = None,
+        columns: int = COLUMNS,
+        rows: int = ROWS,
+    ):
+        if not (0 < columns <= MAX_BOARD_SIZE and 0 < rows <= MAX_BOARD_SIZE):
+            raise ValueError(
+                f"board must be from 1 to {MAX_BOARD_SIZE} cells on each side"
+            )
+        self.columns = columns
+        self.rows = rows
+        self.locations = None
+        if columns * rows <= DENSE_LIMIT:
+            self.locations = _locations(columns, rows)
+        if start_location is None:
+            start_location = (columns // 2, rows // 2)
+        if seed is None:
+            seed = random.randrange(2**64)
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.start_location = start_location
+        self.direction = None
+        self.extender = None
+        self.vacated = None
+        self.shares_occupancy = occupancy is not None
+        if occupancy is None:
+            occupancy = make_occupancy(columns * rows)
+        self.occupancy = occupancy
+        self.snake = deque()
+        self.set_snake([start_location])
+
+    @classmethod
+    def from_snapshot(cls, snapshot: Snapshot) -> "Engine":
+        """Return a new engine in the state of a snapshot."""
+        engine = cls(snapshot.seed, columns=snapshot.columns, rows=snapshot.rows)
+        engine.restore(snapshot)
+        return engine
+
+    def snapshot(self) -> Snapshot:
+        """Return an immutable copy of the engines state."""
+        columns = self.columns
+        return Snapshot(
+            columns,
+            self.rows,
+            self.seed,
+            self.start_location,
+            self.direction,
+            self.extender,
+            self.vacated,
+            array(
+                "i", [row * columns + column for column, row in self.snake]
+            ).tobytes(),
+            self.rng.getstate(),
+            self.occupancy.save(),
+        )
+
+    def restore(self, snapshot: Snapshot) -> None:
+        """Put the engine back into the state of a snapshot.
+
+        The snapshot must be of an engine on a board of the same size. The
+        whole occupancy is replaced, so engines given an occupancy to share
+        with others cannot be restored.
+        """
+        if self.shares_occupancy:
+            raise ValueError("cannot restore an engine sharing its occupancy")
+        if (snapshot.columns, snapshot.rows) != (self.columns, self.rows):
+            raise ValueError("snapshot is of a board of a different size")
+        self.seed = snapshot.seed
+        self.start_location = snapshot.start_location
+        self.direction = snapshot.direction
+        self.extender = snapshot.extender
+        self.vacated = snapshot.vacated
+        cells = array("i")
+        cells.frombytes(snapshot.cells)
+        self.snake = deque([self.cell_location(index) for index in cells])
+        self.rng.setstate(snapshot.rng_state)
+        self.occupancy.load(snapshot.occupancy_state)
+
+    def reset(self) -> None:
+        """Put the snake back at the start location."""
+        self.set_snake([self.start_location])
+        self.direction = None
+        self.extender = None
+        self.vacated = None
+
+    def set_snake(self, locations) -> None:
+        """Replace the snakes body, head first."""
+        for location in self.snake:
+            self._uncover(location)
+        self.snake = deque(self.shared(location) for location in locations)
+        for location in self.snake:
+            self._cover(location)
+
+    def turn(self, direction: str) -> bool:
+        """Change the snakes direction unless that would reverse it.
+
+        Return whether the direction was accepted.
+        """
+        if self.direction == OPPOSITE_DIRECTIONS[direction]:
+            return False
+        self.direction = direction
+        return True
+
+    def turn_first(self, directions) -> None:
+        """Turn to the first of directions that changes the snakes direction.
+
+        Directions are only consumed up to the one that is used, so any left
+        over can be used on later ticks.
+        """
+        for direction in directions:
+            if direction != self.direction and self.turn(direction):
+                break
+
+    def update(self) -> str:
+        """Advance the game by one tick.
+
+        Return the cause of death if the game ended and was reset, else None.
+        """
+        self.move_snake()
+
+        if self.extender is None:
+            index = self.occupancy.random_free(self.rng)
+            if index is not None:
+                self.extender = self.cell_location(index)
+
+        if self.head_segment_collided_with_extender():
+            self.extender = None
+            self.add_segment_to_snake()
+
+        cause = self.cause_of_death()
+        if cause is not None:
+            self.reset()
+        return cause
+
+    def move_snake(self) -> None:
+        """Push a new head in the current direction and pop the tail.
+
+        The cell the tail left is kept in vacated so the snake can grow back
+        into it.
+        """
+        if self.direction is None:
+            return
+        column, row = self.snake[0]
+        move_amount = MOVE_AMOUNTS[self.direction]
+        self.vacated = self.snake.pop()
+        self._uncover(self.vacated)
+        column += move_amount[0]
+        row += move_amount[1]
+        if 0 <= column < self.columns and 0 <= row < self.rows:
+            index = row * self.columns + column
+            if self.locations is None:
+                head = (column, row)
+            else:
+                head = self.locations[index]
+            self.occupancy.add(index)
+        else:
+            head = (column, row)
+        self.snake.appendleft(head)
+
+    def head_segment_collided_with_extender(self) -> bool:
+        """Return whether the snakes head collided with an extending segment."""
+        return self.snake[0] == self.extender
+
+    def add_segment_to_snake(self) -> None:
+        """Add a segment to the back of the snakes body, in the cell the tail
+        last moved out of.
+        """
+        if self.vacated is None:
+            location = self.snake[-1]
+        else:
+            location = self.vacated
+            self.vacated = None
+        self.snake.append(location)
+        self._cover(location)
+
+    def game_over(self) -> bool:
+        """Return whether the head of the snake collided
+        with its body or the edge of the board.
+        """
+        return (
+            self.head_segment_collided_with_self() or self.head_segment_out_of_bounds()
+        )
+
+    def cause_of_death(self) -> str:
+        """Return why the game is over, or None if it is not."""
+        if self.head_segment_collided_with_self():
+            return COLLIDED_WITH_SELF
+        if self.head_segment_out_of_bounds():
+            return OUT_OF_BOUNDS
+        return None
+
+    def head_segment_collided_with_self(self) -> bool:
+        """Return whether the head of the snake collided with its body."""
+        head = self.snake[0]
+        if not self.in_bounds(head):
+            return False
+        return self.occupancy.count(self.cell_index(head)) > 1
+
+    def head_segment_out_of_bounds(self) -> bool:
+        """Return whether the head of the snake collided with the edge of the board."""
+        return not self.in_bounds(self.snake[0])
+
+    def in_bounds(self, location: tuple) -> bool:
+        """Return whether a location is on the board."""
+        column, row = location
+        return 0 <= column < self.columns and 0 <= row < self.rows
+
+    def cell_index(self, location: tuple) -> int:
+        """Return the index of the board cell at a location."""
+        return location[1] * self.columns + location[0]
+
+    def cell_location(self, index: int) -> tuple:
+        """Return the location of the board cell at an index."""
+        if self.locations is not None:
+            return self.locations[index]
+        return (index % self.columns, index // self.columns)
+
+    def shared(self, location: tuple) -> tuple:
+        """Return the shared tuple equal to a location, if it has one."""
+        if self.locations is not None and self.in_bounds(location):
+            return self.locations[self.cell_index(location)]
+        return tuple(location)
+
+    def occupied(self, location: tuple) -> bool:
+        """Return whether a segment of the snake covers a location."""
+        return self.in_bounds(location) and self.cell_index(location) in self.occupancy
+
+    def _cover(self, location: tuple) -> None:
+        if self.in_bounds(location):
+            self.occupancy.add(self.cell_index(location))
+
+    def _uncover(self, location: tuple) -> None:
+        if self.in_bounds(location):
+            self.occupancy.remove(self.cell_index(location))
@@ -1,166 +1,409 @@
-"""Recreation of the game Snake."""
-
-import sys
-import random
-import itertools
-from dataclasses import dataclass
-
-import pygame
-
-FPS = 10
-WINDOW_SIZE = (640, 480)
-CELL_SIZE = (32, 32)
-START_LOCATION = (320, 224)
-UP = "up"
-DOWN = "down"
-LEFT = "left"
-RIGHT = "right"
-BLACK = (0, 0, 0)
-GREEN = (0, 255, 0)
-RED = (255, 0, 0)
-
-
-@dataclass
-class Segment:
-    """Simple class for storing information about a segment."""
-
-    rect: pygame.Rect
-    direction: str = None
-
-
-class Game:
-    """Contains all game logic."""
-
-    def __init__(self):
-        self.direction = None
-        self.extender = None
-        self.cell_locations = self.cell_locations = set(
-            itertools.product(
-                range(0, WINDOW_SIZE[0], CELL_SIZE[0]),
-                range(0, WINDOW_SIZE[1], CELL_SIZE[1]),
-            )
-        )
-        self.snake = [Segment(pygame.Rect(START_LOCATION, CELL_SIZE))]
-        pygame.init()
-        self.fps_clock = pygame.time.Clock()
-        self.displaysurf = pygame.display.set_mode(WINDOW_SIZE)
-        pygame.display.set_caption("Snake")
-
-    def main(self) -> None:
-        """Entry point for the game."""
-        while True:
-            self.update()
-            self.render()
-            self.fps_clock.tick(FPS)
-
-    def update(self) -> None:
-        """Update the game state here."""
-        self.handle_input()
-        self.update_snake_direction(self.direction)
-        self.move_snake()
-
-        if self.extender is None:
-            snake_segments_locations = set(
-                segment.rect.topleft for segment in self.snake
-            )
-            location = random.choice(
-                list(self.cell_locations - snake_segments_locations)
-            )
-            self.extender = pygame.Rect(location, CELL_SIZE)
-
-        if self.head_segment_collided_with_extender():
-            self.extender = None
-            self.add_segment_to_snake()
-
-        if self.game_over():
-            self.snake = [Segment(pygame.Rect(START_LOCATION, CELL_SIZE))]
-            self.direction = None
-            self.extender = None
-
-    def handle_input(self) -> None:
-        """Update the snakes direction based off keyboard input."""
-        if self.input_manager.quit:
-            pygame.quit()
-            sys.exit()
-
-        if self.input_manager.pressed(pygame.K_UP) and self.direction != DOWN:
-            self.direction = UP
-        elif self.input_manager.pressed(pygame.K_DOWN) and self.direction != UP:
-            self.direction = DOWN
-        elif self.input_manager.pressed(pygame.K_LEFT) and self.direction != RIGHT:
-            self.direction = LEFT
-        elif self.input_manager.pressed(pygame.K_RIGHT) and self.direction != LEFT:
-            self.direction = RIGHT
-
-    def update_snake_direction(self, head_direction: str) -> None:
-        """Update the direction of each segment of the snake."""
-        for index in reversed(range(len(self.snake))):
-            self.snake[index].direction = self.snake[index - 1].direction
-        self.snake[0].direction = head_direction
-
-    def move_snake(self) -> None:
-        """Update the position of every segment of the snake."""
-        for segment in self.snake:
-            self.move_segment(segment)
-
-    def move_segment(self, segment: Segment) -> None:
-        """Update the position of a single segment of the snake."""
-        move_amount = {
-            UP: (0, -CELL_SIZE[1]),
-            DOWN: (0, CELL_SIZE[1]),
-            LEFT: (-CELL_SIZE[0], 0),
-            RIGHT: (CELL_SIZE[0], 0),
-        }.get(segment.direction, (0, 0))
-        segment.rect.move_ip(move_amount)
-
-    def head_segment_collided_with_extender(self) -> bool:
-        """Return whether the snakes head collided with an extending segment."""
-        return self.snake[0].rect.colliderect(self.extender)
-
-    def add_segment_to_snake(self) -> None:
-        """Add a segment to the back of the snakes body."""
-        topleft = {
-            UP: (self.snake[-1].rect.x, self.snake[-1].rect.y + CELL_SIZE[1]),
-            DOWN: (self.snake[-1].rect.x, self.snake[-1].rect.y - CELL_SIZE[1]),
-            LEFT: (self.snake[-1].rect.x + CELL_SIZE[0], self.snake[-1].rect.y),
-            RIGHT: (self.snake[-1].rect.x - CELL_SIZE[0], self.snake[-1].rect.y),
-        }.get(self.snake[-1].direction, (0, 0))
-        self.snake.append(
-            Segment(pygame.Rect(topleft, CELL_SIZE), self.snake[-1].direction)
-        )
-
-    def game_over(self) -> bool:
-        """Return whether the head of the snake collided
-        with its body or the edge of the screen.
-        """
-        return (
-            self.head_segment_collided_with_self() or self.head_segment_out_of_bounds()
-        )
-
-    def head_segment_collided_with_self(self) -> bool:
-        """Return whether the head of the snake collided with its body."""
-        return any(
-            [self.snake[0].rect.colliderect(segment) for segment in self.snake[1:]]
-        )
-
-    def head_segment_out_of_bounds(self) -> bool:
-        """Return whether the head of the snake collided with the edge of the screen."""
-        return (
-            self.snake[0].rect.x < 0
-            or self.snake[0].rect.y < 0
-            or self.snake[0].rect.x >= WINDOW_SIZE[0]
-            or self.snake[0].rect.y >= WINDOW_SIZE[1]
-        )
-
-    def render(self) -> None:
-        """Draw everything to screen."""
-        self.displaysurf.fill(BLACK)
-        for segment in self.snake:
-            pygame.draw.rect(self.displaysurf, GREEN, segment.rect)
-        if self.extender is not None:
-            pygame.draw.rect(self.displaysurf, RED, self.extender)
-        pygame.display.update()
-
-
-if __name__ == "__main__":
-    Game().main()
+"""Recreation of the game Snake."""
+
+import sys
+import time
+from dataclasses import dataclass
+
+import pygame
+
+from engine import (
+    COLUMNS,
+    DOWN,
+    FPS,
+    LEFT,
+    MOVE_AMOUNTS,
+    RIGHT,
+    ROWS,
+    UP,
+    Engine,
+    Snapshot,
+)
+from autopilot import Autopilot
+from inputmanager import InputManager
+from replay import Replay
+from sprites import (
+    BLACK,
+    BODY,
+    EMPTY,
+    EXTENDER,
+    GREEN,
+    RED,
+    make_sprites,
+    segment_key,
+)
+from telemetry import HANDLE_INPUT, PROCESS_INPUT, RENDER, SLEEP, UPDATE
+
+CELL_SIZE = (32, 32)
+RENDER_FPS = 60
+MAX_TICKS_PER_FRAME = 5
+MAX_COMMAND_AGE = 500
+OVERLAY_INTERVAL = 0.5
+OVERLAY_WIDTH = 260
+KEY_DIRECTIONS = {
+    pygame.K_UP: UP,
+    pygame.K_DOWN: DOWN,
+    pygame.K_LEFT: LEFT,
+    pygame.K_RIGHT: RIGHT,
+}
+
+
+@dataclass(frozen=True)
+class SavedGame:
+    """A snapshot of the engine and the replay ticks that led up to it."""
+
+    snapshot: Snapshot
+    replay_ticks: bytes
+
+
+class Game:
+    """Draws an Engine to the screen and feeds it keyboard input.
+
+    The game ticks FPS times a second while input is polled and the screen
+    drawn up to RENDER_FPS times a second. With interpolate set, the head is
+    drawn sliding into its next cell between ticks.
+
+    The board is columns by rows cells of cell_size pixels each; only the
+    drawing code deals in pixels. Cells are drawn from sprites made at
+    startup, and with textured set the snake gets a head, a tail and turns.
+
+    With autopilot set to one of the autopilot strategies, the snake steers
+    itself and direction keys are ignored.
+
+    Every tick is recorded to replay, which is appended to replay_path on quit
+    if one is given.
+
+    With telemetry set to a Telemetry, every frame is timed and the timings
+    are drawn in the top left corner.
+    """
+
+    def __init__(
+        self,
+        seed: int = None,
+        replay_path: str = None,
+        interpolate: bool = False,
+        columns: int = COLUMNS,
+        rows: int = ROWS,
+        cell_size: tuple = CELL_SIZE,
+        autopilot: str = None,
+        telemetry=None,
+        textured: bool = False,
+    ):
+        self.engine = Engine(seed, columns=columns, rows=rows)
+        self.autopilot = None
+        if autopilot is not None:
+            self.autopilot = Autopilot(self.engine, autopilot)
+        self.replay = Replay(self.engine.seed, columns=columns, rows=rows)
+        self.cell_size = cell_size
+        self.replay_path = replay_path
+        self.interpolate = interpolate
+        self.input_manager = InputManager(KEY_DIRECTIONS)
+        self.displaysurf = None
+        self.textured = textured
+        self.sprites = None
+        self.cell_rects = None
+        self.font = None
+        self.full_redraw = True
+        self.ticks_since_render = 0
+        self.accumulator = 0.0
+        self.vacated_since_render = []
+        self.drawn_extender = None
+        self.drawn_lead = None
+        self.telemetry = telemetry
+        self.overlay = None
+        self.overlay_drawn_at = 0.0
+        if telemetry is not None:
+            self.handle_input = telemetry.timed(HANDLE_INPUT, self.handle_input)
+
+    def open_display(self) -> None:
+        """Open the window and make the sprites drawn to it.
+
+        Only the display is initialized, not every pygame subsystem, so no
+        audio device is opened. This happens on the first render rather than
+        when the game is made, so a game can be ticked without a window.
+        """
+        pygame.display.init()
+        self.displaysurf = pygame.display.set_mode(
+            (
+                self.engine.columns * self.cell_size[0],
+                self.engine.rows * self.cell_size[1],
+            )
+        )
+        pygame.display.set_caption("Snake")
+        self.sprites = make_sprites(self.cell_size, self.textured)
+        width, height = self.cell_size
+        self.cell_rects = [
+            (column * width, row * height, width, height)
+            for row in range(self.engine.rows)
+            for column in range(self.engine.columns)
+        ]
+        self.input_manager.allow_only((pygame.QUIT, pygame.KEYDOWN, pygame.KEYUP))
+        self.full_redraw = True
+
+    def main(self) -> None:
+        """Entry point for the game."""
+        self.open_display()
+        fps_clock = pygame.time.Clock()
+        telemetry = self.telemetry
+        previous_time = time.perf_counter()
+        while True:
+            current_time = time.perf_counter()
+            elapsed = current_time - previous_time
+            previous_time = current_time
+
+            self.input_manager.process_input()
+            if telemetry is not None:
+                telemetry.record(PROCESS_INPUT, time.perf_counter() - current_time)
+            alpha = self.advance(elapsed)
+            if telemetry is not None:
+                update_time = time.perf_counter()
+
+            self.render(alpha if self.interpolate else 0.0)
+            if telemetry is not None:
+                render_time = time.perf_counter()
+                telemetry.record(RENDER, render_time - update_time)
+            fps_clock.tick(RENDER_FPS)
+            if telemetry is not None:
+                telemetry.record(SLEEP, time.perf_counter() - render_time)
+                telemetry.end_frame(render_time - current_time)
+
+    def advance(self, elapsed: float) -> float:
+        """Run the ticks that fit in elapsed seconds plus any time left over.
+
+        At most MAX_TICKS_PER_FRAME ticks run; past that the backlog is
+        dropped rather than caught up. Returns how far into the next tick the
+        game is, from 0 to 1, for interpolation.
+        """
+        tick_length = 1 / FPS
+        self.accumulator += elapsed
+        ticks = 0
+        while self.accumulator >= tick_length:
+            if ticks == MAX_TICKS_PER_FRAME:
+                self.accumulator = 0.0
+                break
+            self.update()
+            self.accumulator -= tick_length
+            ticks += 1
+        return self.accumulator / tick_length
+
+    def save(self) -> SavedGame:
+        """Return a copy of the game state and of the replay so far."""
+        return SavedGame(self.engine.snapshot(), bytes(self.replay.ticks))
+
+    def restore(self, saved: SavedGame) -> None:
+        """Put the game back into a saved state and redraw it all.
+
+        The replay is put back too, so it still reproduces the game from its
+        seed, even if the save was of a game with another seed.
+        """
+        snapshot = saved.snapshot
+        self.engine.restore(snapshot)
+        self.replay = Replay(
+            snapshot.seed,
+            bytearray(saved.replay_ticks),
+            columns=snapshot.columns,
+            rows=snapshot.rows,
+        )
+        if self.autopilot is not None:
+            self.autopilot.plan.clear()
+        self.full_redraw = True
+        self.ticks_since_render = 0
+        self.vacated_since_render = []
+
+    def fork(self, saved: SavedGame = None) -> Engine:
+        """Return a new engine, without a display, in a saved state.
+
+        The current state is used if no saved state is given.
+        """
+        if saved is None:
+            return Engine.from_snapshot(self.engine.snapshot())
+        return Engine.from_snapshot(saved.snapshot)
+
+    def update(self) -> None:
+        """Update the game state here.
+
+        With telemetry, each tick of the rules is recorded as UPDATE on its
+        own, apart from the input handled before it.
+        """
+        self.handle_input()
+        self.replay.record(self.engine)
+        if self.telemetry is None:
+            cause = self.engine.update()
+        else:
+            began = time.perf_counter()
+            cause = self.engine.update()
+            self.telemetry.record(UPDATE, time.perf_counter() - began)
+        if cause is not None:
+            self.full_redraw = True
+        self.ticks_since_render += 1
+        if self.engine.vacated is not None:
+            self.vacated_since_render.append(self.engine.vacated)
+
+    def handle_input(self) -> None:
+        """Update the snakes direction from the oldest queued direction key.
+
+        Keys that would not change the direction are skipped, so each tick
+        turns the snake at most once and later keys wait for later ticks. The
+        autopilot, if there is one, chooses the direction instead.
+        """
+        if self.input_manager.quit:
+            if self.replay_path is not None:
+                with open(self.replay_path, "ab") as replay_file:
+                    replay_file.write(self.replay.to_bytes())
+            pygame.quit()
+            sys.exit()
+
+        if self.autopilot is not None:
+            direction = self.autopilot.choose()
+            if direction is not None:
+                self.engine.turn(direction)
+            return
+
+        self.engine.turn_first(
+            iter(lambda: self.input_manager.next_command(MAX_COMMAND_AGE), None)
+        )
+
+    def render(self, alpha: float = 0.0) -> None:
+        """Draw everything that changed since the last render to screen.
+
+        Only the cells gained by the head, the cells left by the tail and the
+        old and new extender are redrawn, and only those are pushed to the
+        display, unless the game was reset. alpha is how far the game is
+        through the current tick. The display is opened first if it is not
+        yet.
+        """
+        if self.displaysurf is None:
+            self.open_display()
+        if self.full_redraw:
+            self.draw_everything()
+            dirty_rects = None
+        else:
+            dirty_rects = self.draw_changes()
+        lead_rect = self.draw_lead(alpha)
+        self.finish_render()
+        if self.telemetry is not None:
+            overlay_rect = self.draw_overlay()
+        if dirty_rects is None:
+            pygame.display.update()
+        else:
+            if lead_rect is not None:
+                dirty_rects.append(lead_rect)
+            if self.telemetry is not None:
+                dirty_rects.append(overlay_rect)
+            pygame.display.update(dirty_rects)
+
+    def draw_everything(self) -> None:
+        """Draw the whole board."""
+        self.displaysurf.fill(BLACK)
+        snake = list(self.engine.snake)
+        blits = [self.segment_blit(snake, index) for index in range(len(snake))]
+        if self.engine.extender is not None:
+            blits.append((self.sprites[EXTENDER], self.cell_rect(self.engine.extender)))
+        self.displaysurf.blits(blits, doreturn=False)
+        self.full_redraw = False
+
+    def draw_changes(self) -> list:
+        """Draw the cells that changed since the last render and return their rects.
+
+        Cells left by the tail, the old extender and the sliding head are
+        cleared first. The segments that moved or changed shape, which are
+        the new head cells, the old head and the tail, and a new extender
+        are then drawn over them in the same batch. The rects returned are
+        the shared rects of the cells, so nothing is allocated for them.
+        """
+        snake = self.engine.snake
+        extender = self.engine.extender
+        cleared = self.vacated_since_render
+        if extender != self.drawn_extender:
+            cleared.append(self.drawn_extender)
+        cleared.append(self.drawn_lead)
+        empty = self.sprites[EMPTY]
+        blits = [
+            (empty, self.cell_rect(location))
+            for location in cleared
+            if location is not None
+        ]
+        if self.ticks_since_render:
+            last = len(snake) - 1
+            blits.extend(
+                self.segment_blit(snake, index)
+                for index in range(min(self.ticks_since_render, last) + 1)
+            )
+            blits.append(self.segment_blit(snake, last))
+        if extender is not None and (
+            extender != self.drawn_extender or extender == self.drawn_lead
+        ):
+            blits.append((self.sprites[EXTENDER], self.cell_rect(extender)))
+        self.displaysurf.blits(blits, doreturn=False)
+        return [rect for _, rect in blits]
+
+    def segment_blit(self, snake, index: int) -> tuple:
+        """Return the sprite and rect of the segment of snake at index."""
+        if self.textured:
+            sprite = self.sprites[segment_key(snake, index)]
+        else:
+            sprite = self.sprites[BODY, frozenset()]
+        return (sprite, self.cell_rect(snake[index]))
+
+    def draw_lead(self, alpha: float) -> tuple:
+        """Draw alpha of the head sliding into the cell it moves to next.
+
+        Return the rect of that cell, or None if nothing was drawn.
+        """
+        self.drawn_lead = None
+        if alpha <= 0.0 or self.engine.direction is None:
+            return None
+        column, row = self.engine.snake[0]
+        move_amount = MOVE_AMOUNTS[self.engine.direction]
+        location = (column + move_amount[0], row + move_amount[1])
+        if not self.engine.in_bounds(location) or self.engine.occupied(location):
+            return None
+        rect = self.cell_rect(location)
+        left, top, cell_width, cell_height = rect
+        width = round(cell_width * alpha) if move_amount[0] else cell_width
+        height = round(cell_height * alpha) if move_amount[1] else cell_height
+        if move_amount[0] < 0:
+            left += cell_width - width
+        if move_amount[1] < 0:
+            top += cell_height - height
+        pygame.draw.rect(self.displaysurf, GREEN, (left, top, width, height))
+        self.drawn_lead = location
+        return rect
+
+    def draw_overlay(self) -> pygame.Rect:
+        """Draw the telemetry summary over the board and return its rect.
+
+        The text is only rendered again every OVERLAY_INTERVAL seconds. Its
+        background is opaque and always the same width, so it covers the
+        last one. The font module is only initialized the first time.
+        """
+        now = time.perf_counter()
+        if self.overlay is None or now - self.overlay_drawn_at >= OVERLAY_INTERVAL:
+            if self.font is None:
+                pygame.font.init()
+                self.font = pygame.font.Font(None, 18)
+            font = self.font
+            lines = self.telemetry.lines()
+            height = font.get_linesize()
+            self.overlay = pygame.Surface((OVERLAY_WIDTH, height * len(lines)))
+            for number, line in enumerate(lines):
+                self.overlay.blit(font.render(line, True, GREEN), (2, number * height))
+            self.overlay_drawn_at = now
+        return self.displaysurf.blit(self.overlay, (0, 0))
+
+    def cell_rect(self, location: tuple) -> tuple:
+        """Return the rect of the screen covered by a cell.
+
+        Every cell has one rect made when the display is opened, shared by
+        every frame that draws it.
+        """
+        return self.cell_rects[location[1] * self.engine.columns + location[0]]
+
+    def finish_render(self) -> None:
+        """Forget the changes that have now been drawn."""
+        self.ticks_since_render = 0
+        self.vacated_since_render = []
+        self.drawn_extender = self.engine.extender
+
+
+if __name__ == "__main__":
+    Game().main()
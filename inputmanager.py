@@ -1,9 +1,19 @@
+import time
+from collections import deque
+
 import pygame
 
 
+def _milliseconds() -> float:
+    # pygame.time.get_ticks stays at 0 until a Clock first ticks.
+    return time.perf_counter() * 1000
+
+
 class InputManager:
 
-    def __init__(self):
+    def __init__(self, command_keys: dict = None, max_commands: int = 8):
+        self.command_keys = command_keys or {}
+        self._commands = deque(maxlen=max_commands)
         self._pressed_keys_and_buttons = set()
         self._held_keys_and_buttons = set()
         self._released_keys_and_buttons = set()
@@ -19,6 +29,18 @@ class InputManager:
     def released(self, key_or_button) -> bool:
         return key_or_button in self._released_keys_and_buttons
 
+    def next_command(self, max_age: int = None):
+        now = _milliseconds()
+        while self._commands:
+            timestamp, command = self._commands.popleft()
+            if max_age is None or now - timestamp <= max_age:
+                return command
+        return None
+
+    def allow_only(self, event_types) -> None:
+        pygame.event.set_blocked(None)
+        pygame.event.set_allowed(list(event_types))
+
     def process_input(self) -> None:
         self._released_keys_and_buttons.clear()
 
@@ -35,6 +57,10 @@ class InputManager:
                 self.cursor_location = event.pos
 
             elif event.type == pygame.KEYDOWN or event.type == pygame.MOUSEBUTTONDOWN:
+                if event.type == pygame.KEYDOWN and event.key in self.command_keys:
+                    self._commands.append(
+                        (_milliseconds(), self.command_keys[event.key])
+                    )
                 if event_key_or_button in self._pressed_keys_and_buttons:
                     self._held_keys_and_buttons.add(event_key_or_button)
                     self._pressed_keys_and_buttons.remove(event_key_or_button)
@@ -0,0 +1,163 @@
+"""Constant time index of which board cells are covered by the snake."""
+
+from array import array
+from functools import lru_cache
+
+DENSE_LIMIT = 1 << 16
+
+
+def make_occupancy(size: int):
+    """Return an index suited to a board of size cells.
+
+    Small boards get a dense Occupancy. Bigger ones get a SparseOccupancy so
+    memory grows with the snake rather than with the board.
+    """
+    if size <= DENSE_LIMIT:
+        return Occupancy(size)
+    return SparseOccupancy(size)
+
+
+def _typecode(size: int) -> str:
+    return "H" if size <= 1 << 16 else "i"
+
+
+@lru_cache(maxsize=8)
+def _indexes(size: int) -> array:
+    return array(_typecode(size), range(size))
+
+
+class Occupancy:
+    """Counts how many segments cover each cell of a board.
+
+    Cells are addressed by index. Uncovered cells are also kept in a
+    swap-remove array so a random free cell can be picked in constant time.
+    Boards of up to 65536 cells keep them as two byte indexes.
+    """
+
+    def __init__(self, size: int):
+        self.counts = bytearray(size)
+        self.free = _indexes(size)[:]
+        self.free_positions = _indexes(size)[:]
+
+    def __contains__(self, index: int) -> bool:
+        return self.counts[index] > 0
+
+    def count(self, index: int) -> int:
+        """Return how many segments cover the cell."""
+        return self.counts[index]
+
+    def add(self, index: int) -> None:
+        """Cover the cell with one more segment."""
+        if self.counts[index] == 0:
+            self._remove_free(index)
+        self.counts[index] += 1
+
+    def remove(self, index: int) -> None:
+        """Uncover the cell by one segment."""
+        self.counts[index] -= 1
+        if self.counts[index] == 0:
+            self._add_free(index)
+
+    def random_free(self, rng) -> int:
+        """Return a random uncovered cell, or None if the board is full."""
+        if not self.free:
+            return None
+        return self.free[rng.randrange(len(self.free))]
+
+    def free_order(self):
+        """Return the free cells in the order random cells are picked from."""
+        return self.free
+
+    def save(self) -> tuple:
+        """Return an immutable copy of which cells are covered."""
+        return (bytes(self.counts), self.free.tobytes(), self.free_positions.tobytes())
+
+    def load(self, state: tuple) -> None:
+        """Cover the cells recorded by save."""
+        counts, free, free_positions = state
+        self.counts = bytearray(counts)
+        self.free = array(self.free.typecode)
+        self.free.frombytes(free)
+        self.free_positions = array(self.free_positions.typecode)
+        self.free_positions.frombytes(free_positions)
+
+    def order_free(self, indexes) -> None:
+        """Rearrange the free cells into the order of indexes.
+
+        Random free cells depend on this order as well as on the random
+        generator, so it is needed to make a copy pick the same cells.
+        """
+        free = array(self.free.typecode, indexes)
+        if sorted(free) != sorted(self.free):
+            raise ValueError("indexes must be exactly the free cells")
+        self.free = free
+        for position, index in enumerate(free):
+            self.free_positions[index] = position
+
+    def _add_free(self, index: int) -> None:
+        self.free_positions[index] = len(self.free)
+        self.free.append(index)
+
+    def _remove_free(self, index: int) -> None:
+        position = self.free_positions[index]
+        last = self.free.pop()
+        if last != index:
+            self.free[position] = last
+            self.free_positions[last] = position
+
+
+class SparseOccupancy:
+    """Counts how many segments cover each cell of a board, in a dict.
+
+    Only covered cells are stored. Random free cells are found by sampling
+    until an uncovered one turns up, falling back to listing every free cell
+    once the board is more than half covered.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self.counts = {}
+
+    def __contains__(self, index: int) -> bool:
+        return index in self.counts
+
+    def count(self, index: int) -> int:
+        """Return how many segments cover the cell."""
+        return self.counts.get(index, 0)
+
+    def add(self, index: int) -> None:
+        """Cover the cell with one more segment."""
+        self.counts[index] = self.counts.get(index, 0) + 1
+
+    def remove(self, index: int) -> None:
+        """Uncover the cell by one segment."""
+        count = self.counts.pop(index) - 1
+        if count:
+            self.counts[index] = count
+
+    def random_free(self, rng) -> int:
+        """Return a random uncovered cell, or None if the board is full."""
+        if len(self.counts) * 2 > self.size:
+            free = [index for index in range(self.size) if index not in self.counts]
+            return free[rng.randrange(len(free))] if free else None
+        while True:
+            index = rng.randrange(self.size)
+            if index not in self.counts:
+                return index
+
+    def free_order(self):
+        """Return nothing, as picks depend only on the random generator."""
+        return ()
+
+    def save(self) -> tuple:
+        """Return an immutable copy of which cells are covered."""
+        return tuple(self.counts.items())
+
+    def load(self, state: tuple) -> None:
+        """Cover the cells recorded by save."""
+        self.counts = dict(state)
+
+    def order_free(self, indexes) -> None:
+        """Accept the empty order written by free_order."""
+        if indexes:
+            raise ValueError("a sparse occupancy has no free cell order")
@@ -0,0 +1,201 @@
+"""Runs slices of a batch of Snake games in worker processes.
+
+Each worker owns a BatchEngine for its slice of games and writes the slice's
+observations, rewards and done flags straight into shared memory, so the
+parent reads them without anything being pickled.
+"""
+
+import os
+import time
+import argparse
+import multiprocessing
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from batch import NO_ACTION, BatchEngine
+from engine import COLUMNS, ROWS
+
+STEP = "step"
+RUN = "run"
+CLOSE = "close"
+
+
+class SharedArray:
+    """A NumPy array backed by a named shared memory block."""
+
+    def __init__(self, shape: tuple, dtype, name: str = None):
+        self.shape = shape
+        self.dtype = np.dtype(dtype)
+        size = max(int(np.prod(shape)) * self.dtype.itemsize, 1)
+        self.memory = shared_memory.SharedMemory(
+            name=name, create=name is None, size=size
+        )
+        self.array = np.ndarray(shape, dtype=self.dtype, buffer=self.memory.buf)
+
+    def describe(self) -> tuple:
+        """Return what another process needs to attach to this array."""
+        return (self.shape, self.dtype.str, self.memory.name)
+
+    def close(self) -> None:
+        del self.array
+        self.memory.close()
+
+
+class ParallelRunner:
+    """Steps num_games games spread across num_workers processes."""
+
+    def __init__(
+        self,
+        num_games: int,
+        num_workers: int = None,
+        columns: int = COLUMNS,
+        rows: int = ROWS,
+        seed=None,
+    ):
+        self.num_workers = min(num_workers or os.cpu_count(), num_games)
+        self.observations = SharedArray((num_games, rows, columns), np.int8)
+        self.actions = SharedArray((num_games,), np.int8)
+        self.rewards = SharedArray((num_games,), np.float64)
+        self.dones = SharedArray((num_games,), np.bool_)
+        self.stats = SharedArray((self.num_workers, 2), np.float64)
+        self.actions.array[:] = NO_ACTION
+        self.stats.array[:] = 0
+        shared = tuple(
+            array.describe()
+            for array in (
+                self.observations,
+                self.actions,
+                self.rewards,
+                self.dones,
+                self.stats,
+            )
+        )
+        bounds = np.linspace(0, num_games, self.num_workers + 1).astype(int)
+        seeds = np.random.SeedSequence(seed).spawn(self.num_workers)
+        self.connections = []
+        self.processes = []
+        for worker in range(self.num_workers):
+            parent_connection, child_connection = multiprocessing.Pipe()
+            process = multiprocessing.Process(
+                target=_work,
+                args=(
+                    child_connection,
+                    shared,
+                    worker,
+                    bounds[worker],
+                    bounds[worker + 1],
+                    columns,
+                    rows,
+                    seeds[worker],
+                ),
+                daemon=True,
+            )
+            process.start()
+            child_connection.close()
+            self.connections.append(parent_connection)
+            self.processes.append(process)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def step(self, actions) -> tuple:
+        """Advance every game by one tick, like BatchEngine.step.
+
+        The returned arrays are views of shared memory and are overwritten by
+        the next call.
+        """
+        self.actions.array[:] = actions
+        self._send_all((STEP,))
+        return self.observations.array, self.rewards.array, self.dones.array
+
+    def run(self, ticks: int) -> None:
+        """Let every worker step its games ticks times with random actions."""
+        self._send_all((RUN, ticks))
+
+    def steps_per_second(self) -> list:
+        """Return the game ticks each worker has simulated per second of work."""
+        steps, seconds = self.stats.array.T
+        return [
+            worker_steps / worker_seconds if worker_seconds else 0.0
+            for worker_steps, worker_seconds in zip(steps, seconds)
+        ]
+
+    def close(self) -> None:
+        """Stop the workers and free the shared memory."""
+        for connection in self.connections:
+            connection.send((CLOSE,))
+            connection.close()
+        for process in self.processes:
+            process.join()
+        self.connections = []
+        self.processes = []
+        for array in (
+            self.observations,
+            self.actions,
+            self.rewards,
+            self.dones,
+            self.stats,
+        ):
+            array.close()
+            array.memory.unlink()
+
+    def _send_all(self, command: tuple) -> None:
+        for connection in self.connections:
+            connection.send(command)
+        for connection in self.connections:
+            connection.recv()
+
+
+def _work(connection, shared, worker, start, stop, columns, rows, seed) -> None:
+    """Serve commands from a ParallelRunner for games start to stop."""
+    arrays = [SharedArray(*description) for description in shared]
+    observations, actions, rewards, dones, stats = (array.array for array in arrays)
+    batch = BatchEngine(stop - start, columns, rows, seed)
+    rng = np.random.default_rng(seed.spawn(1)[0])
+    while True:
+        command = connection.recv()
+        if command[0] == CLOSE:
+            break
+        began = time.perf_counter()
+        if command[0] == STEP:
+            ticks = 1
+            step_actions = [actions[start:stop]]
+        else:
+            ticks = command[1]
+            step_actions = rng.integers(NO_ACTION, 4, size=(ticks, stop - start))
+        for tick_actions in step_actions:
+            (
+                observations[start:stop],
+                rewards[start:stop],
+                dones[start:stop],
+            ) = batch.step(tick_actions)
+        stats[worker] += (ticks * (stop - start), time.perf_counter() - began)
+        connection.send(None)
+    del observations, actions, rewards, dones, stats
+    for array in arrays:
+        array.close()
+    connection.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--games", type=int, default=4096)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--ticks", type=int, default=1000)
+    args = parser.parse_args()
+
+    with ParallelRunner(args.games, args.workers, seed=0) as runner:
+        began = time.perf_counter()
+        runner.run(args.ticks)
+        elapsed = time.perf_counter() - began
+        for worker, rate in enumerate(runner.steps_per_second()):
+            print(f"worker {worker}: {rate:,.0f} steps/s")
+        print(f"total: {args.games * args.ticks / elapsed:,.0f} steps/s")
+
+
+if __name__ == "__main__":
+    main()
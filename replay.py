@@ -0,0 +1,75 @@
+"""Compact recording and headless playback of Snake sessions.
+
+A replay is the engine seed plus one byte per tick giving the direction the
+snake was heading in when that tick was simulated. Replays are written as
+self-delimiting records, so any number of them can be appended to one file.
+"""
+
+import struct
+from dataclasses import dataclass, field
+
+from engine import COLUMNS, DOWN, LEFT, RIGHT, ROWS, UP, Engine
+
+MAGIC = b"SNKR"
+VERSION = 1
+HEADER = struct.Struct("<4sBQHHI")
+DIRECTIONS = (None, UP, DOWN, LEFT, RIGHT)
+DIRECTION_CODES = {direction: code for code, direction in enumerate(DIRECTIONS)}
+
+
+class ReplayError(ValueError):
+    """Raised when replay data is malformed."""
+
+
+@dataclass
+class Replay:
+    """The seed and per-tick direction codes of one session."""
+
+    seed: int
+    ticks: bytearray = field(default_factory=bytearray)
+    columns: int = COLUMNS
+    rows: int = ROWS
+
+    def record(self, engine: Engine) -> None:
+        """Record the direction engine is about to be updated with."""
+        self.ticks.append(DIRECTION_CODES[engine.direction])
+
+    def to_bytes(self) -> bytes:
+        """Return the replay as a single record."""
+        header = HEADER.pack(
+            MAGIC, VERSION, self.seed, self.columns, self.rows, len(self.ticks)
+        )
+        return header + self.ticks
+
+
+def read_replays(buffer):
+    """Yield every replay record in buffer, in order."""
+    view = memoryview(buffer)
+    offset = 0
+    while offset < len(view):
+        if len(view) - offset < HEADER.size:
+            raise ReplayError(f"truncated replay header at byte {offset}")
+        magic, version, seed, columns, rows, tick_count = HEADER.unpack_from(
+            view, offset
+        )
+        if magic != MAGIC:
+            raise ReplayError(f"bad replay magic at byte {offset}")
+        if version != VERSION:
+            raise ReplayError(f"unsupported replay version {version}")
+        offset += HEADER.size
+        if len(view) - offset < tick_count:
+            raise ReplayError(f"truncated replay ticks at byte {offset}")
+        ticks = bytearray(view[offset : offset + tick_count])
+        if ticks and max(ticks) >= len(DIRECTIONS):
+            raise ReplayError(f"unknown direction code {max(ticks)} at byte {offset}")
+        offset += tick_count
+        yield Replay(seed, ticks, columns, rows)
+
+
+def play(replay: Replay) -> Engine:
+    """Re-simulate replay as fast as possible and return the final engine."""
+    engine = Engine(replay.seed, columns=replay.columns, rows=replay.rows)
+    for code in replay.ticks:
+        engine.direction = DIRECTIONS[code]
+        engine.update()
+    return engine
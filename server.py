@@ -0,0 +1,278 @@
+"""Authoritative Snake server hosting many arenas on one asyncio tick loop.
+
+Clients connect over TCP and send newline separated commands:
+
+    join <arena>            play in an arena, answered with "joined <arena> <slot>"
+    watch <arena>           receive an arena's state without playing
+    up|down|left|right      queue a turn for the joined snake
+
+Every tick, each subscribed client is sent its arena's state as one line of
+JSON. Writes are never awaited: a client whose unsent data grows past
+MAX_WRITE_BUFFER is disconnected instead of slowing the tick loop down.
+"""
+
+import json
+import time
+import random
+import asyncio
+import argparse
+import statistics
+from collections import deque
+
+from engine import COLUMNS, DOWN, FPS, LEFT, RIGHT, ROWS, UP, Engine
+from occupancy import make_occupancy
+
+MAX_COMMANDS = 4
+MAX_WRITE_BUFFER = 64 * 1024
+DIRECTIONS = (UP, DOWN, LEFT, RIGHT)
+
+
+class Arena:
+    """A board shared by up to max_snakes snakes.
+
+    Snakes move one after another in slot order, and running into another
+    snake ends the game of the snake that moved. A snake whose start cell is
+    covered by another snake waits off the board until it is free.
+    """
+
+    def __init__(
+        self,
+        max_snakes: int = 1,
+        seed: int = None,
+        columns: int = COLUMNS,
+        rows: int = ROWS,
+    ):
+        self.rng = random.Random(seed)
+        self.columns = columns
+        self.rows = rows
+        self.occupancy = make_occupancy(columns * rows)
+        self.start_locations = [
+            (columns * (slot + 1) // (max_snakes + 1), rows // 2)
+            for slot in range(max_snakes)
+        ]
+        self.snakes = {}
+        self.commands = {}
+        self.waiting = set()
+        self.ticks = 0
+
+    def join(self) -> int:
+        """Add a snake in the first free slot and return the slot.
+
+        Return None if every slot is taken.
+        """
+        for slot, start_location in enumerate(self.start_locations):
+            if slot not in self.snakes:
+                self.snakes[slot] = Engine(
+                    self.rng.randrange(2**64),
+                    self.occupancy,
+                    start_location,
+                    self.columns,
+                    self.rows,
+                )
+                self.commands[slot] = deque(maxlen=MAX_COMMANDS)
+                self._wait_if_blocked(slot)
+                return slot
+        return None
+
+    def leave(self, slot: int) -> None:
+        """Take the snake in slot off the board."""
+        self.snakes.pop(slot).set_snake([])
+        del self.commands[slot]
+        self.waiting.discard(slot)
+
+    def command(self, slot: int, direction: str) -> None:
+        """Queue a turn for the snake in slot."""
+        self.commands[slot].append(direction)
+
+    def tick(self) -> None:
+        """Turn every snake by at most one queued command and advance it.
+
+        Waiting snakes are put back on their start cells once they are free.
+        """
+        for slot, snake in self.snakes.items():
+            commands = self.commands[slot]
+            if slot in self.waiting:
+                commands.clear()
+                if snake.cell_index(self.start_locations[slot]) not in self.occupancy:
+                    snake.reset()
+                    self.waiting.discard(slot)
+                continue
+            snake.turn_first(commands.popleft() for _ in range(len(commands)))
+            if snake.update() is not None:
+                self._wait_if_blocked(slot)
+        self.ticks += 1
+
+    def _wait_if_blocked(self, slot: int) -> None:
+        """Take the snake in slot off the board if it started on another snake."""
+        snake = self.snakes[slot]
+        if self.occupancy.count(snake.cell_index(snake.snake[0])) > 1:
+            snake.set_snake([])
+            self.waiting.add(slot)
+
+    def state(self) -> dict:
+        """Return the arena as data that can be encoded as JSON."""
+        return {
+            "tick": self.ticks,
+            "snakes": {slot: list(snake.snake) for slot, snake in self.snakes.items()},
+            "extenders": {slot: snake.extender for slot, snake in self.snakes.items()},
+        }
+
+
+class Server:
+    """Ticks every arena tick_rate times a second and serves their clients."""
+
+    def __init__(
+        self,
+        num_arenas: int,
+        max_snakes: int = 1,
+        tick_rate: int = FPS,
+        seed: int = None,
+    ):
+        rng = random.Random(seed)
+        self.arenas = [
+            Arena(max_snakes, rng.randrange(2**64)) for _ in range(num_arenas)
+        ]
+        self.subscribers = [set() for _ in range(num_arenas)]
+        self.tick_rate = tick_rate
+        self.tick_seconds = deque(maxlen=1000)
+        self.late_ticks = 0
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 0):
+        """Start accepting clients and ticking, and return the asyncio server."""
+        server = await asyncio.start_server(self.handle_client, host, port)
+        self.ticker = asyncio.create_task(self.run())
+        return server
+
+    async def run(self) -> None:
+        """Tick on a fixed schedule, skipping ticks rather than falling behind."""
+        loop = asyncio.get_running_loop()
+        tick_length = 1 / self.tick_rate
+        next_tick = loop.time()
+        while True:
+            self.tick()
+            next_tick += tick_length
+            delay = next_tick - loop.time()
+            if delay < 0:
+                self.late_ticks += 1
+                next_tick = loop.time()
+                delay = 0
+            await asyncio.sleep(delay)
+
+    def tick(self) -> None:
+        """Advance every arena once and send the new states to subscribers."""
+        began = time.perf_counter()
+        for arena, subscribers in zip(self.arenas, self.subscribers):
+            arena.tick()
+            if subscribers:
+                line = json.dumps(arena.state()).encode() + b"\n"
+                for writer in list(subscribers):
+                    self.send(writer, line, subscribers)
+        self.tick_seconds.append(time.perf_counter() - began)
+
+    def send(self, writer, line: bytes, subscribers: set) -> None:
+        """Write line to a client without waiting, dropping clients that lag."""
+        if writer.transport.get_write_buffer_size() > MAX_WRITE_BUFFER:
+            subscribers.discard(writer)
+            writer.close()
+        elif not writer.is_closing():
+            writer.write(line)
+
+    def arenas_per_core(self) -> float:
+        """Estimate how many arenas like these one core could tick on time."""
+        if not self.tick_seconds:
+            return 0.0
+        seconds_per_arena = statistics.fmean(self.tick_seconds) / len(self.arenas)
+        return 1 / (self.tick_rate * seconds_per_arena)
+
+    async def handle_client(self, reader, writer) -> None:
+        arena_index = slot = None
+        try:
+            async for line in reader:
+                words = line.decode(errors="replace").split()
+                if not words:
+                    continue
+                if words[0] in DIRECTIONS and slot is not None:
+                    self.arenas[arena_index].command(slot, words[0])
+                elif words[0] in ("join", "watch") and arena_index is None:
+                    arena_index = self.parse_arena(words)
+                    if arena_index is None:
+                        writer.write(b"error no such arena\n")
+                        continue
+                    if words[0] == "join":
+                        slot = self.arenas[arena_index].join()
+                        if slot is None:
+                            writer.write(b"error arena is full\n")
+                            arena_index = None
+                            continue
+                        writer.write(f"joined {arena_index} {slot}\n".encode())
+                    self.subscribers[arena_index].add(writer)
+                else:
+                    writer.write(b"error unknown command\n")
+        except (ConnectionError, ValueError):
+            pass
+        finally:
+            if arena_index is not None:
+                self.subscribers[arena_index].discard(writer)
+                if slot is not None:
+                    self.arenas[arena_index].leave(slot)
+            writer.close()
+
+    def parse_arena(self, words: list) -> int:
+        """Return the arena index named by a command, or None if it is invalid."""
+        if len(words) != 2 or not words[1].isdigit():
+            return None
+        arena_index = int(words[1])
+        return arena_index if arena_index < len(self.arenas) else None
+
+
+def measure(num_arenas: int, max_snakes: int, ticks: int) -> Server:
+    """Tick arenas full of randomly turning snakes as fast as possible."""
+    server = Server(num_arenas, max_snakes, seed=0)
+    rng = random.Random(0)
+    for arena in server.arenas:
+        while arena.join() is not None:
+            pass
+    for _ in range(ticks):
+        for arena in server.arenas:
+            for slot in arena.snakes:
+                if rng.random() < 0.2:
+                    arena.command(slot, rng.choice(DIRECTIONS))
+        server.tick()
+    return server
+
+
+async def serve_forever(args) -> None:
+    server = Server(args.arenas, args.snakes)
+    asyncio_server = await server.serve(args.host, args.port)
+    address = asyncio_server.sockets[0].getsockname()
+    print(f"serving {args.arenas} arenas on {address[0]}:{address[1]}")
+    async with asyncio_server:
+        await asyncio_server.serve_forever()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--arenas", type=int, default=100)
+    parser.add_argument("--snakes", type=int, default=1)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument(
+        "--measure",
+        type=int,
+        metavar="TICKS",
+        help="tick bot-filled arenas TICKS times and report capacity instead",
+    )
+    args = parser.parse_args()
+
+    if args.measure:
+        server = measure(args.arenas, args.snakes, args.measure)
+        print(
+            f"{statistics.fmean(server.tick_seconds) * 1000:.3f} ms per tick, "
+            f"about {server.arenas_per_core():,.0f} arenas per core at {FPS} Hz"
+        )
+    else:
+        asyncio.run(serve_forever(args))
+
+
+if __name__ == "__main__":
+    main()
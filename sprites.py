@@ -0,0 +1,121 @@
+"""Cell sprites drawn once at startup and blitted every frame.
+
+Plain sprites fill the whole cell with one colour. Textured snake sprites
+join each segment to its neighbours, so bends show as turns, and give the
+head eyes and the tail a taper.
+
+Snake sprites are keyed by the kind of segment and the sides of the cell
+that lead to the neighbouring segments.
+"""
+
+from itertools import combinations
+
+import pygame
+
+from engine import DOWN, LEFT, MOVE_AMOUNTS, OPPOSITE_DIRECTIONS, RIGHT, UP
+
+BLACK = (0, 0, 0)
+GREEN = (0, 255, 0)
+DARK_GREEN = (0, 160, 0)
+RED = (255, 0, 0)
+EMPTY = "empty"
+EXTENDER = "extender"
+HEAD = "head"
+BODY = "body"
+TAIL = "tail"
+SIDES = {MOVE_AMOUNTS[direction]: direction for direction in (UP, DOWN, LEFT, RIGHT)}
+
+
+def side_towards(location: tuple, other: tuple) -> str:
+    """Return the side of a cell that a neighbouring cell is on, or None."""
+    return SIDES.get((other[0] - location[0], other[1] - location[1]))
+
+
+def segment_key(snake, index: int) -> tuple:
+    """Return the key of the sprite for the segment of snake at index."""
+    location = snake[index]
+    sides = []
+    if index > 0:
+        sides.append(side_towards(location, snake[index - 1]))
+    if index < len(snake) - 1:
+        sides.append(side_towards(location, snake[index + 1]))
+    if index == 0:
+        kind = HEAD
+    elif index == len(snake) - 1:
+        kind = TAIL
+    else:
+        kind = BODY
+    return (kind, frozenset(side for side in sides if side is not None))
+
+
+def make_sprites(cell_size: tuple, textured: bool = False) -> dict:
+    """Return converted surfaces for every kind of cell.
+
+    The display mode must already be set, as the surfaces are converted to
+    its pixel format.
+    """
+    sprites = {
+        EMPTY: _filled(cell_size, BLACK),
+        EXTENDER: _filled(cell_size, RED),
+    }
+    side_sets = [frozenset()]
+    for count in (1, 2):
+        side_sets.extend(
+            frozenset(sides) for sides in combinations(SIDES.values(), count)
+        )
+    plain = _filled(cell_size, GREEN)
+    for kind in (HEAD, BODY, TAIL):
+        for sides in side_sets:
+            if textured:
+                sprites[(kind, sides)] = _segment(cell_size, kind, sides).convert()
+            else:
+                sprites[(kind, sides)] = plain
+    return sprites
+
+
+def _filled(cell_size: tuple, color: tuple) -> pygame.Surface:
+    surface = pygame.Surface(cell_size).convert()
+    surface.fill(color)
+    return surface
+
+
+def _segment(cell_size: tuple, kind: str, sides: frozenset) -> pygame.Surface:
+    width, height = cell_size
+    margin = max(min(width, height) // 8, 1)
+    if kind == TAIL:
+        margin *= 2
+    surface = pygame.Surface(cell_size)
+    surface.fill(BLACK)
+    core = pygame.Rect(margin, margin, width - 2 * margin, height - 2 * margin)
+    pygame.draw.rect(surface, GREEN, core)
+    for side in sides:
+        if side == UP:
+            pygame.draw.rect(surface, GREEN, (core.left, 0, core.width, core.bottom))
+        elif side == DOWN:
+            pygame.draw.rect(surface, GREEN, (core.left, core.top, core.width, height))
+        elif side == LEFT:
+            pygame.draw.rect(surface, GREEN, (0, core.top, core.right, core.height))
+        else:
+            pygame.draw.rect(surface, GREEN, (core.left, core.top, width, core.height))
+    if kind == HEAD:
+        _draw_eyes(surface, core, sides)
+    elif kind == BODY:
+        pygame.draw.rect(
+            surface, DARK_GREEN, core.inflate(-core.width // 2, -core.height // 2)
+        )
+    return surface
+
+
+def _draw_eyes(surface: pygame.Surface, core: pygame.Rect, sides: frozenset) -> None:
+    """Draw two eyes on the side of the head away from the body."""
+    front = OPPOSITE_DIRECTIONS[next(iter(sides))] if sides else RIGHT
+    size = max(core.width // 5, 1)
+    step_x, step_y = MOVE_AMOUNTS[front]
+    center_x = core.centerx + step_x * core.width // 4
+    center_y = core.centery + step_y * core.height // 4
+    spread_x = step_y * core.width // 4
+    spread_y = step_x * core.height // 4
+    for sign in (-1, 1):
+        eye = pygame.Rect(0, 0, size, size)
+        eye.center = (center_x + sign * spread_x, center_y + sign * spread_y)
+        pygame.draw.rect(surface, BLACK, eye)
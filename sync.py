@@ -0,0 +1,240 @@
+"""Binary keyframes and per-tick deltas of Engine state.
+
+A keyframe holds everything needed to rebuild an engine. A delta holds only
+what one update changed: whether the snake moved or grew, and the new
+extender or direction if those changed. The receiver moves its own copy of
+the snake the same way, so most ticks cost two bytes no matter how long the
+snake is. Every message starts with a byte holding the format version and
+the message kind.
+
+Cells are sent as board indexes in LEB128 varints.
+"""
+
+from array import array
+
+from engine import Engine
+from replay import DIRECTION_CODES, DIRECTIONS
+
+VERSION = 2
+KEYFRAME = 1
+DELTA = 2
+
+MOVED = 1
+GREW = 2
+EXTENDER_CHANGED = 4
+DIRECTION_CHANGED = 8
+
+HAS_RNG_STATE = 1
+
+RNG_STATE_WORDS = 625
+
+
+class SyncError(ValueError):
+    """Raised when a message cannot be decoded."""
+
+
+def _write_varint(out: bytearray, value: int) -> None:
+    while value >= 0x80:
+        out.append(value & 0x7F | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+class _Reader:
+    def __init__(self, data):
+        self.data = memoryview(data)
+        self.offset = 0
+
+    def byte(self) -> int:
+        if self.offset >= len(self.data):
+            raise SyncError("message ended early")
+        value = self.data[self.offset]
+        self.offset += 1
+        return value
+
+    def read(self, count: int) -> memoryview:
+        if self.offset + count > len(self.data):
+            raise SyncError("message ended early")
+        value = self.data[self.offset : self.offset + count]
+        self.offset += count
+        return value
+
+    def varint(self) -> int:
+        value = shift = 0
+        while True:
+            byte = self.byte()
+            value |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                return value
+            shift += 7
+
+
+def _write_optional_cell(out: bytearray, engine: Engine, location: tuple) -> None:
+    _write_varint(out, 0 if location is None else engine.cell_index(location) + 1)
+
+
+def _cell_location(engine: Engine, index: int) -> tuple:
+    if index >= engine.columns * engine.rows:
+        raise SyncError(f"cell {index} is not on the board")
+    return engine.cell_location(index)
+
+
+def _read_optional_cell(reader: _Reader, engine: Engine) -> tuple:
+    value = reader.varint()
+    return None if value == 0 else _cell_location(engine, value - 1)
+
+
+def _read_direction(reader: _Reader) -> str:
+    code = reader.byte()
+    if code >= len(DIRECTIONS):
+        raise SyncError(f"unknown direction code {code}")
+    return DIRECTIONS[code]
+
+
+def encode_keyframe(engine: Engine, include_rng: bool = False) -> bytes:
+    """Return a message from which an identical engine can be decoded.
+
+    The engines random generator state and the order of its free cells take
+    a few kB, so they are only included when asked for. Without them the
+    decoded engine places different extenders than the original if it is
+    updated itself rather than by deltas.
+    """
+    out = bytearray([VERSION << 4 | KEYFRAME, HAS_RNG_STATE if include_rng else 0])
+    _write_varint(out, engine.seed)
+    _write_varint(out, engine.columns)
+    _write_varint(out, engine.rows)
+    _write_varint(out, engine.cell_index(engine.start_location))
+    out.append(DIRECTION_CODES[engine.direction])
+    _write_optional_cell(out, engine, engine.extender)
+    _write_optional_cell(out, engine, engine.vacated)
+    _write_varint(out, len(engine.snake))
+    for location in engine.snake:
+        _write_varint(out, engine.cell_index(location))
+    if include_rng:
+        out += array("I", engine.rng.getstate()[1]).tobytes()
+        free = engine.occupancy.free_order()
+        _write_varint(out, len(free))
+        for index in free:
+            _write_varint(out, index)
+    return bytes(out)
+
+
+class DeltaEncoder:
+    """Describes each update of an engine as a delta.
+
+    A keyframe is sent first and then every keyframe_interval messages, so
+    anyone who starts listening part way through catches up quickly. One is
+    also sent whenever the snake is replaced rather than moved, such as when
+    the game is reset.
+    """
+
+    def __init__(
+        self, engine: Engine, keyframe_interval: int = 100, include_rng: bool = False
+    ):
+        self.engine = engine
+        self.keyframe_interval = keyframe_interval
+        self.include_rng = include_rng
+        self.messages_until_keyframe = 0
+        self.snake = None
+
+    def encode(self) -> bytes:
+        """Return the message describing the engines latest update."""
+        if self.messages_until_keyframe == 0 or self.engine.snake is not self.snake:
+            message = encode_keyframe(self.engine, self.include_rng)
+            self.messages_until_keyframe = self.keyframe_interval
+        else:
+            message = self.encode_delta()
+        self.messages_until_keyframe -= 1
+        self._remember()
+        return message
+
+    def encode_delta(self) -> bytes:
+        """Return how the engine changed since the last message."""
+        engine = self.engine
+        flags = 0
+        if engine.snake[0] != self.head:
+            flags |= MOVED
+            if len(engine.snake) > self.length:
+                flags |= GREW
+        if engine.extender != self.extender:
+            flags |= EXTENDER_CHANGED
+        if engine.direction != self.direction:
+            flags |= DIRECTION_CHANGED
+
+        out = bytearray([VERSION << 4 | DELTA, flags])
+        if flags & EXTENDER_CHANGED:
+            _write_optional_cell(out, engine, engine.extender)
+        if flags & DIRECTION_CHANGED:
+            out.append(DIRECTION_CODES[engine.direction])
+        return bytes(out)
+
+    def _remember(self) -> None:
+        self.snake = self.engine.snake
+        self.head = self.engine.snake[0]
+        self.length = len(self.engine.snake)
+        self.extender = self.engine.extender
+        self.direction = self.engine.direction
+
+
+def decode(message, engine: Engine = None) -> Engine:
+    """Apply a message and return the resulting engine.
+
+    A keyframe builds a new engine. A delta is applied to engine, which must
+    hold the state the delta was encoded after. Raise SyncError if the
+    message is malformed.
+    """
+    reader = _Reader(message)
+    header = reader.byte()
+    if header >> 4 != VERSION:
+        raise SyncError(f"unsupported sync version {header >> 4}")
+    kind = header & 0x0F
+    if kind == KEYFRAME:
+        return _decode_keyframe(reader)
+    if kind == DELTA:
+        if engine is None:
+            raise SyncError("a delta needs an engine to apply to")
+        _apply_delta(reader, engine)
+        return engine
+    raise SyncError(f"unknown message kind {kind}")
+
+
+def _decode_keyframe(reader: _Reader) -> Engine:
+    flags = reader.byte()
+    seed = reader.varint()
+    columns = reader.varint()
+    rows = reader.varint()
+    start_index = reader.varint()
+    try:
+        engine = Engine(seed, columns=columns, rows=rows)
+    except ValueError as error:
+        raise SyncError(str(error)) from None
+    engine.start_location = _cell_location(engine, start_index)
+    engine.direction = _read_direction(reader)
+    engine.extender = _read_optional_cell(reader, engine)
+    engine.vacated = _read_optional_cell(reader, engine)
+    engine.set_snake(
+        [_cell_location(engine, reader.varint()) for _ in range(reader.varint())]
+    )
+    if flags & HAS_RNG_STATE:
+        words = array("I")
+        words.frombytes(reader.read(RNG_STATE_WORDS * 4))
+        free = [reader.varint() for _ in range(reader.varint())]
+        try:
+            engine.rng.setstate((3, tuple(words), None))
+            engine.occupancy.order_free(free)
+        except ValueError as error:
+            raise SyncError(str(error)) from None
+    return engine
+
+
+def _apply_delta(reader: _Reader, engine: Engine) -> None:
+    flags = reader.byte()
+    extender = _read_optional_cell(reader, engine) if flags & EXTENDER_CHANGED else None
+    if flags & DIRECTION_CHANGED:
+        engine.direction = _read_direction(reader)
+    if flags & MOVED:
+        engine.move_snake()
+        if flags & GREW:
+            engine.add_segment_to_snake()
+    if flags & EXTENDER_CHANGED:
+        engine.extender = extender
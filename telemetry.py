@@ -0,0 +1,115 @@
+"""Rolling timings of each phase of the game loop.
+
+Game.main records how long every frame spends processing input, handling
+it, updating, rendering and sleeping until the next frame. The last window
+timings of each phase are kept, so percentiles describe recent frames only.
+"""
+
+import csv
+import json
+import time
+import functools
+from collections import deque
+
+PROCESS_INPUT = "process_input"
+HANDLE_INPUT = "handle_input"
+UPDATE = "update"
+RENDER = "render"
+SLEEP = "sleep"
+PHASES = (PROCESS_INPUT, HANDLE_INPUT, UPDATE, RENDER, SLEEP)
+WINDOW = 600
+EXPORT_INTERVAL = 5.0
+
+
+def percentile(sorted_values: list, fraction: float) -> float:
+    """Return the value below which fraction of sorted_values lie."""
+    if not sorted_values:
+        return 0.0
+    return sorted_values[
+        min(int(len(sorted_values) * fraction), len(sorted_values) - 1)
+    ]
+
+
+class Telemetry:
+    """Keeps the last window timings of each phase, in seconds.
+
+    A frame whose work, everything but the sleep, takes longer than
+    frame_budget seconds has missed its deadline. With export_path set, a
+    summary is appended to it every export_interval seconds, as CSV rows if
+    the path ends in .csv and as lines of JSON otherwise.
+    """
+
+    def __init__(
+        self,
+        frame_budget: float,
+        window: int = WINDOW,
+        export_path: str = None,
+        export_interval: float = EXPORT_INTERVAL,
+    ):
+        self.frame_budget = frame_budget
+        self.timings = {phase: deque(maxlen=window) for phase in PHASES}
+        self.frames = 0
+        self.missed_deadlines = 0
+        self.export_path = export_path
+        self.export_interval = export_interval
+        self.exported_at = time.perf_counter()
+
+    def record(self, phase: str, seconds: float) -> None:
+        """Remember how long a phase took."""
+        self.timings[phase].append(seconds)
+
+    def timed(self, phase: str, function):
+        """Return function wrapped to record each call as phase."""
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            began = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.timings[phase].append(time.perf_counter() - began)
+
+        return wrapper
+
+    def end_frame(self, work_seconds: float) -> None:
+        """Count a frame, and export a summary if one is due."""
+        self.frames += 1
+        if work_seconds > self.frame_budget:
+            self.missed_deadlines += 1
+        if self.export_path is not None:
+            now = time.perf_counter()
+            if now - self.exported_at >= self.export_interval:
+                self.export()
+                self.exported_at = now
+
+    def summary(self) -> dict:
+        """Return the frame counts and the p50 and p99 of each phase in ms."""
+        result = {"frames": self.frames, "missed_deadlines": self.missed_deadlines}
+        for phase, timings in self.timings.items():
+            ordered = sorted(timings)
+            result[f"{phase}_p50_ms"] = percentile(ordered, 0.50) * 1000
+            result[f"{phase}_p99_ms"] = percentile(ordered, 0.99) * 1000
+        return result
+
+    def lines(self) -> list:
+        """Return the summary as short lines of text for an overlay."""
+        summary = self.summary()
+        lines = [
+            f"{phase}: {summary[f'{phase}_p50_ms']:.2f} / "
+            f"{summary[f'{phase}_p99_ms']:.2f} ms"
+            for phase in PHASES
+        ]
+        lines.append(f"missed {self.missed_deadlines} of {self.frames} frames")
+        return lines
+
+    def export(self) -> None:
+        """Append the summary to export_path."""
+        row = {"time": time.time(), **self.summary()}
+        with open(self.export_path, "a", newline="") as export_file:
+            if self.export_path.endswith(".csv"):
+                writer = csv.DictWriter(export_file, fieldnames=list(row))
+                if export_file.tell() == 0:
+                    writer.writeheader()
+                writer.writerow(row)
+            else:
+                export_file.write(json.dumps(row) + "\n")
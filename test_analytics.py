@@ -0,0 +1,110 @@
+import os
+import tempfile
+import unittest
+
+import analytics
+import engine
+import replay
+
+
+def make_replay(seed, directions):
+    return replay.Replay(
+        seed, bytearray(replay.DIRECTION_CODES[direction] for direction in directions)
+    )
+
+
+# From the start location the snake is 7 cells from the top of the board, so
+# heading up ends the game on the eighth tick.
+INTO_THE_WALL = [engine.UP] * 8
+
+
+# Steers towards extenders until the snake is five segments long, then turns
+# it round in a square, so the head runs into the body on the last tick.
+def into_itself(seed):
+    session = engine.Engine(seed)
+    directions = []
+    while len(session.snake) < 5:
+        if session.extender is not None:
+            (x, y), (extender_x, extender_y) = session.snake[0], session.extender
+            if extender_x != x:
+                session.turn(engine.LEFT if extender_x < x else engine.RIGHT)
+            else:
+                session.turn(engine.UP if extender_y < y else engine.DOWN)
+        directions.append(session.direction)
+        session.update()
+    if session.direction in (engine.UP, engine.DOWN):
+        across = (
+            engine.RIGHT if session.snake[0][0] < session.columns // 2 else engine.LEFT
+        )
+    else:
+        across = engine.DOWN if session.snake[0][1] < session.rows // 2 else engine.UP
+    back = engine.OPPOSITE_DIRECTIONS[session.direction]
+    return directions + [across, back, engine.OPPOSITE_DIRECTIONS[across]]
+
+
+class TestSimulate(unittest.TestCase):
+    def test_game_ending_at_the_wall_is_reported(self):
+        (result,) = analytics.simulate(make_replay(1, INTO_THE_WALL))
+        self.assertEqual(result.cause, engine.OUT_OF_BOUNDS)
+        self.assertEqual(result.ticks, 8)
+
+    def test_game_ending_in_the_snakes_own_body_is_reported(self):
+        directions = into_itself(2)
+        (result,) = analytics.simulate(make_replay(2, directions))
+        self.assertEqual(result.cause, engine.COLLIDED_WITH_SELF)
+        self.assertEqual(result.score, 4)
+        self.assertEqual(result.ticks, len(directions))
+
+    def test_every_game_in_a_replay_is_reported(self):
+        results = list(analytics.simulate(make_replay(1, INTO_THE_WALL * 3 + [None])))
+        self.assertEqual(
+            [result.cause for result in results],
+            [engine.OUT_OF_BOUNDS] * 3 + [analytics.UNFINISHED],
+        )
+
+
+class TestSummarize(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "archive.snkr")
+        with open(self.path, "wb") as archive:
+            for seed in range(10):
+                archive.write(make_replay(seed, INTO_THE_WALL * 2).to_bytes())
+
+    def test_chunks_cover_the_archive_in_whole_records(self):
+        chunks = list(analytics.chunks(self.path, chunk_size=1))
+        self.assertEqual(len(chunks), 10)
+        self.assertEqual(chunks[0][1], 0)
+        self.assertEqual(chunks[-1][2], os.path.getsize(self.path))
+
+    def test_games_from_every_chunk_are_counted(self):
+        summary = analytics.summarize([self.path], processes=2, chunk_size=100)
+        self.assertEqual(summary.games, 20)
+        self.assertEqual(summary.ticks, 160)
+        self.assertEqual(summary.causes, {engine.OUT_OF_BOUNDS: 20})
+        self.assertEqual(summary.scores, {0: 20})
+
+    def test_causes_of_death_are_counted_apart(self):
+        with open(self.path, "ab") as archive:
+            archive.write(make_replay(2, into_itself(2)).to_bytes())
+        summary = analytics.summarize([self.path], processes=2, chunk_size=100)
+        self.assertEqual(
+            summary.causes,
+            {engine.OUT_OF_BOUNDS: 20, engine.COLLIDED_WITH_SELF: 1},
+        )
+        self.assertEqual(summary.scores, {0: 20, 4: 1})
+
+    def test_malformed_record_is_counted_and_skipped(self):
+        corrupt = make_replay(3, INTO_THE_WALL)
+        corrupt.ticks[2] = len(replay.DIRECTIONS) + 4
+        with open(self.path, "ab") as archive:
+            archive.write(corrupt.to_bytes())
+            archive.write(make_replay(4, INTO_THE_WALL).to_bytes())
+        summary = analytics.summarize([self.path], processes=2, chunk_size=100)
+        self.assertEqual(summary.games, 21)
+        self.assertEqual(summary.invalid_records, 1)
+
+    def test_empty_archive_has_no_games(self):
+        open(self.path, "wb").close()
+        self.assertEqual(analytics.summarize([self.path], processes=1).games, 0)
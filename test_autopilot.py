@@ -0,0 +1,107 @@
+import unittest
+
+import engine
+from autopilot import GREEDY, HAMILTONIAN, Autopilot, hamiltonian_cycle
+
+
+def drive(session, autopilot, ticks):
+    causes = []
+    for _ in range(ticks):
+        direction = autopilot.choose()
+        if direction is not None:
+            session.turn(direction)
+        cause = session.update()
+        if cause is not None:
+            causes.append(cause)
+        if len(session.snake) == session.columns * session.rows:
+            break
+    return causes
+
+
+class TestHamiltonianCycle(unittest.TestCase):
+    def test_cycle_visits_every_cell_once_moving_one_cell_at_a_time(self):
+        for columns, rows in ((6, 4), (4, 5), (20, 15)):
+            order, positions = hamiltonian_cycle(columns, rows)
+            self.assertEqual(sorted(order), list(range(columns * rows)))
+            for position, index in enumerate(order):
+                self.assertEqual(positions[index], position)
+                following = order[(position + 1) % len(order)]
+                column, row = index % columns, index // columns
+                self.assertEqual(
+                    abs(following % columns - column) + abs(following // columns - row),
+                    1,
+                )
+
+    def test_board_with_odd_columns_and_rows_has_no_cycle(self):
+        self.assertIsNone(hamiltonian_cycle(5, 5))
+        with self.assertRaises(ValueError):
+            Autopilot(engine.Engine(columns=5, rows=5), HAMILTONIAN)
+
+    def test_board_one_cell_across_has_no_cycle(self):
+        for columns, rows in ((1, 4), (6, 1)):
+            self.assertIsNone(hamiltonian_cycle(columns, rows))
+            with self.assertRaises(ValueError):
+                Autopilot(engine.Engine(columns=columns, rows=rows), HAMILTONIAN)
+
+
+class TestAutopilot(unittest.TestCase):
+    def test_hamiltonian_autopilot_fills_the_board(self):
+        session = engine.Engine(0, columns=6, rows=4)
+        causes = drive(session, Autopilot(session, HAMILTONIAN), 10_000)
+        self.assertEqual(causes, [])
+        self.assertEqual(len(session.snake), 24)
+
+    def test_hamiltonian_autopilot_fills_boards_two_cells_across(self):
+        for columns, rows in ((2, 2), (4, 2), (2, 6)):
+            session = engine.Engine(0, columns=columns, rows=rows)
+            causes = drive(session, Autopilot(session, HAMILTONIAN), 10_000)
+            self.assertEqual(causes, [])
+            self.assertEqual(len(session.snake), columns * rows)
+
+    def test_greedy_autopilot_eats_without_dying(self):
+        session = engine.Engine(0)
+        causes = drive(session, Autopilot(session, GREEDY), 3000)
+        self.assertEqual(causes, [])
+        self.assertGreater(len(session.snake), 30)
+
+    def test_greedy_autopilot_fills_a_board_with_a_cycle(self):
+        for seed in range(3):
+            session = engine.Engine(seed, columns=6, rows=4)
+            causes = drive(session, Autopilot(session, GREEDY), 10_000)
+            self.assertEqual(causes, [])
+            self.assertEqual(len(session.snake), 24)
+
+    def test_greedy_autopilot_can_stall_on_a_board_without_a_cycle(self):
+        session = engine.Engine(0, columns=5, rows=5)
+        causes = drive(session, Autopilot(session, GREEDY), 5000)
+        self.assertEqual(causes, [])
+        self.assertEqual(len(session.snake), 14)
+
+    def test_greedy_autopilot_keeps_growing_on_a_full_size_board(self):
+        session = engine.Engine(0)
+        causes = drive(session, Autopilot(session, GREEDY), 12_000)
+        self.assertEqual(causes, [])
+        self.assertGreater(len(session.snake), 150)
+
+    def test_path_to_the_extender_is_reused_across_ticks(self):
+        session = engine.Engine(0)
+        session.extender = (15, 7)
+        autopilot = Autopilot(session)
+        self.assertEqual(autopilot.choose(), engine.RIGHT)
+        plan = autopilot.plan
+        session.turn(engine.RIGHT)
+        session.update()
+        autopilot.choose()
+        self.assertIs(autopilot.plan, plan)
+        self.assertEqual(len(plan), 3)
+
+    def test_greedy_autopilot_does_not_eat_into_a_dead_end(self):
+        session = engine.Engine(0, columns=4, rows=3)
+        session.set_snake([(1, 1), (1, 0), (2, 0), (3, 0), (3, 1), (3, 2)])
+        session.direction = engine.DOWN
+        session.extender = (0, 0)
+        self.assertIn(Autopilot(session).choose(), (engine.DOWN, engine.RIGHT))
+
+    def test_unknown_strategy_is_rejected(self):
+        with self.assertRaises(ValueError):
+            Autopilot(engine.Engine(), "random")
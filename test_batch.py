@@ -0,0 +1,61 @@
+import unittest
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+if numpy is not None:
+    import batch
+
+
+@unittest.skipIf(numpy is None, "numpy is not installed")
+class TestBatchEngineStep(unittest.TestCase):
+    def setUp(self):
+        self.batch = batch.BatchEngine(3, columns=6, rows=5, seed=0)
+
+    def head(self, game):
+        return (self.batch.head_rows[game], self.batch.head_columns[game])
+
+    def test_snakes_do_not_move_without_an_action(self):
+        self.batch.step([batch.NO_ACTION] * 3)
+        self.assertEqual(self.head(0), (2, 3))
+
+    def test_each_game_moves_in_its_own_direction(self):
+        self.batch.step([0, 2, 3])
+        self.assertEqual(self.head(0), (1, 3))
+        self.assertEqual(self.head(1), (2, 2))
+        self.assertEqual(self.head(2), (2, 4))
+
+    def test_snake_is_not_reversed(self):
+        self.batch.step([0, 0, 0])
+        self.batch.step([1, 1, 1])
+        self.assertEqual(self.head(0), (0, 3))
+
+    def test_observation_marks_head_and_extender(self):
+        observations, _, _ = self.batch.step([batch.NO_ACTION] * 3)
+        self.assertEqual(observations.shape, (3, 5, 6))
+        self.assertEqual(observations[0, 2, 3], batch.HEAD)
+        self.assertEqual((observations[0] == batch.EXTENDER).sum(), 1)
+
+    def test_snake_grows_and_is_rewarded_when_reaching_extender(self):
+        self.batch.extenders[:] = 2 * 6 + 4
+        observations, rewards, dones = self.batch.step([3, 3, 3])
+        self.assertEqual(list(self.batch.lengths), [2, 2, 2])
+        self.assertEqual(list(rewards), [1.0, 1.0, 1.0])
+        self.assertEqual(observations[0, 2, 3], batch.BODY)
+        self.assertFalse(dones.any())
+
+    def test_game_leaving_the_board_is_reset(self):
+        for _ in range(3):
+            _, rewards, dones = self.batch.step([0, batch.NO_ACTION, 2])
+        self.assertEqual(list(dones), [True, False, False])
+        self.assertEqual(rewards[0], -1.0)
+        self.assertEqual(self.head(0), (2, 3))
+        self.assertEqual(self.batch.directions[0], batch.NO_ACTION)
+
+    def test_game_colliding_with_itself_is_reset(self):
+        self.batch.lifetimes[0, 1 * 6 + 3] = 2
+        self.batch.lengths[0] = 3
+        _, _, dones = self.batch.step([0, batch.NO_ACTION, batch.NO_ACTION])
+        self.assertEqual(list(dones), [True, False, False])
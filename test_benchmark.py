@@ -0,0 +1,50 @@
+import unittest
+
+import benchmark
+import engine
+
+
+class TestLayAlongCycle(unittest.TestCase):
+    def test_snake_circles_the_board_without_growing_or_dying(self):
+        for length in benchmark.snake_lengths(6, 4):
+            session = engine.Engine(0, columns=6, rows=4)
+            prepare = benchmark.lay_along_cycle(session, length)
+            for _ in range(30):
+                prepare()
+                self.assertIsNone(session.update())
+                self.assertEqual(len(session.snake), length)
+
+    def test_lengths_run_from_one_segment_to_a_full_board(self):
+        lengths = benchmark.snake_lengths(20, 15)
+        self.assertEqual(lengths[0], 1)
+        self.assertEqual(lengths[-1], 300)
+
+
+class TestCompare(unittest.TestCase):
+    def results(self, seconds):
+        result = {"name": "render", "columns": 20, "rows": 15, "length": 1}
+        return {"results": [dict(result, seconds=seconds)]}
+
+    def test_slowdown_beyond_the_tolerance_is_a_regression(self):
+        changes = benchmark.compare(self.results(1.0), self.results(1.2), 0.1)
+        self.assertEqual(len(changes), 1)
+        self.assertTrue(changes[0][-1])
+
+    def test_slowdown_within_the_tolerance_is_not_a_regression(self):
+        changes = benchmark.compare(self.results(1.0), self.results(1.05), 0.1)
+        self.assertFalse(changes[0][-1])
+
+
+class TestTimeStartup(unittest.TestCase):
+    def test_startup_is_timed_in_a_fresh_interpreter(self):
+        seconds = benchmark.time_startup("import engine", 1)
+        self.assertGreater(seconds, 0)
+        self.assertLess(seconds, 5)
+
+
+class TestGameMemory(unittest.TestCase):
+    def test_longer_snakes_take_more_memory(self):
+        short = benchmark.game_memory(20, 15, 1, 20)
+        long = benchmark.game_memory(20, 15, 300, 20)
+        self.assertGreater(short, 0)
+        self.assertGreater(long, short)
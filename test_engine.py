@@ -0,0 +1,421 @@
+import os
+import sys
+import unittest
+import subprocess
+import dataclasses
+
+import engine
+
+
+class TestMoveSnake(unittest.TestCase):
+    def setUp(self):
+        self.engine = engine.Engine()
+        self.previous_location = self.engine.snake[0]
+
+    def test_head_segment_moves_up_expected_distance(self):
+        self.engine.direction = engine.UP
+        self.engine.move_snake()
+        self.assertEqual(self.engine.snake[0][1], self.previous_location[1] - 1)
+        self.assertEqual(self.engine.snake[0][0], self.previous_location[0])
+
+    def test_head_segment_moves_down_expected_distance(self):
+        self.engine.direction = engine.DOWN
+        self.engine.move_snake()
+        self.assertEqual(self.engine.snake[0][1], self.previous_location[1] + 1)
+        self.assertEqual(self.engine.snake[0][0], self.previous_location[0])
+
+    def test_head_segment_moves_left_expected_distance(self):
+        self.engine.direction = engine.LEFT
+        self.engine.move_snake()
+        self.assertEqual(self.engine.snake[0][0], self.previous_location[0] - 1)
+        self.assertEqual(self.engine.snake[0][1], self.previous_location[1])
+
+    def test_head_segment_moves_right_expected_distance(self):
+        self.engine.direction = engine.RIGHT
+        self.engine.move_snake()
+        self.assertEqual(self.engine.snake[0][0], self.previous_location[0] + 1)
+        self.assertEqual(self.engine.snake[0][1], self.previous_location[1])
+
+    def test_snake_does_not_move_without_a_direction(self):
+        self.engine.move_snake()
+        self.assertEqual(self.engine.snake[0], self.previous_location)
+
+    def test_child_segment_moves_to_previous_location_of_parent(self):
+        self.engine.set_snake([self.previous_location, (self.previous_location[0], 8)])
+        self.engine.direction = engine.LEFT
+        self.engine.move_snake()
+        self.assertEqual(self.engine.snake[1], self.previous_location)
+        self.assertEqual(len(self.engine.snake), 2)
+
+    def test_tail_location_is_kept_as_vacated(self):
+        self.engine.set_snake([self.previous_location, (self.previous_location[0], 8)])
+        self.engine.direction = engine.LEFT
+        self.engine.move_snake()
+        self.assertEqual(self.engine.vacated, (self.previous_location[0], 8))
+
+
+class TestHeadSegmentCollidedWithExtender(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.engine = engine.Engine()
+        cls.engine.set_snake([(1, 1)])
+        cls.engine.extender = (0, 0)
+
+    def test_returns_false_when_extender_is_not_colliding_with_head_segment(self):
+        self.engine.extender = (0, 0)
+        self.assertFalse(self.engine.head_segment_collided_with_extender())
+
+    def test_returns_true_when_extender_is_colliding_with_head_segment(self):
+        self.engine.extender = (1, 1)
+        self.assertTrue(self.engine.head_segment_collided_with_extender())
+
+
+class TestHeadSegmentCollidedWithSelf(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.engine = engine.Engine()
+        cls.engine.set_snake([(0, 0)])
+
+    def test_returns_false_when_head_segment_has_no_child_segments(self):
+        self.assertFalse(self.engine.head_segment_collided_with_self())
+
+    def test_returns_false_when_head_segment_has_a_child_segment_at_another_location(
+        self,
+    ):
+        self.engine.set_snake([(0, 0), (1, 0)])
+        self.assertFalse(self.engine.head_segment_collided_with_self())
+
+    def test_returns_true_when_head_segment_has_a_child_segment_at_the_same_location(
+        self,
+    ):
+        self.engine.set_snake([(0, 0), (0, 0)])
+        self.assertTrue(self.engine.head_segment_collided_with_self())
+
+
+class TestHeadSegmentOutOfBounds(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.engine = engine.Engine()
+
+    def test_returns_false_when_head_segment_is_in_bounds(self):
+        self.engine.set_snake([(1, 1)])
+        self.assertFalse(self.engine.head_segment_out_of_bounds())
+
+    def test_returns_false_when_head_segments_top_is_at_top_boundary(self):
+        self.engine.set_snake([(1, 0)])
+        self.assertFalse(self.engine.head_segment_out_of_bounds())
+
+    def test_returns_true_when_head_segment_is_past_top_boundary(self):
+        self.engine.set_snake([(0, -1)])
+        self.assertTrue(self.engine.head_segment_out_of_bounds())
+
+    def test_returns_false_when_head_segments_left_is_at_left_boundary(self):
+        self.engine.set_snake([(0, 1)])
+        self.assertFalse(self.engine.head_segment_out_of_bounds())
+
+    def test_returns_true_when_head_segment_is_past_left_boundary(self):
+        self.engine.set_snake([(-1, 1)])
+        self.assertTrue(self.engine.head_segment_out_of_bounds())
+
+    def test_return_true_when_head_segments_top_is_at_bottom_boundary(self):
+        self.engine.set_snake([(1, engine.ROWS)])
+        self.assertTrue(self.engine.head_segment_out_of_bounds())
+
+    def test_returns_true_when_head_segment_is_past_bottom_boundary(self):
+        self.engine.set_snake([(1, engine.ROWS + 1)])
+        self.assertTrue(self.engine.head_segment_out_of_bounds())
+
+    def test_returns_true_when_head_segments_left_is_at_right_boundary(self):
+        self.engine.set_snake([(engine.COLUMNS, 1)])
+        self.assertTrue(self.engine.head_segment_out_of_bounds())
+
+    def test_returns_true_when_head_segment_is_past_right_boundary(self):
+        self.engine.set_snake([(engine.COLUMNS + 1, 1)])
+        self.assertTrue(self.engine.head_segment_out_of_bounds())
+
+
+class TestGameOver(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.engine = engine.Engine()
+
+    def setUp(self):
+        self.engine.set_snake([(0, 0), (1, 0)])
+
+    def test_returns_false_when_head_segment_did_not_go_out_of_bounds_or_collide_with_self(
+        self,
+    ):
+        self.assertFalse(self.engine.game_over())
+
+    def test_returns_true_when_only_head_segment_out_of_bounds(self):
+        self.engine.set_snake([(-1, -1), (1, 0)])
+        self.assertTrue(self.engine.game_over())
+
+    def test_returns_true_when_only_head_segment_collided_with_self(self):
+        self.engine.set_snake([(0, 0), (0, 0)])
+        self.assertTrue(self.engine.game_over())
+
+    def test_returns_true_when_head_segment_out_of_bounds_and_collided_with_self(self):
+        self.engine.set_snake([(-1, -1), (-1, -1)])
+        self.assertTrue(self.engine.game_over())
+
+
+class TestAddSegmentToSnake(unittest.TestCase):
+    def setUp(self):
+        self.engine = engine.Engine()
+        self.engine.set_snake([(2, 2)])
+
+    def move_and_add_segment(self, direction):
+        self.engine.direction = direction
+        self.engine.move_snake()
+        self.engine.add_segment_to_snake()
+
+    def test_segment_is_added_to_snake(self):
+        self.move_and_add_segment(engine.UP)
+        self.assertEqual(len(self.engine.snake), 2)
+
+    def test_added_segment_is_above_head_segment(self):
+        self.move_and_add_segment(engine.DOWN)
+        self.assertLess(self.engine.snake[1][1], self.engine.snake[0][1])
+
+    def test_added_segment_is_below_head_segment(self):
+        self.move_and_add_segment(engine.UP)
+        self.assertGreater(self.engine.snake[1][1], self.engine.snake[0][1])
+
+    def test_added_segment_is_to_the_left_of_head_segment(self):
+        self.move_and_add_segment(engine.RIGHT)
+        self.assertLess(self.engine.snake[1][0], self.engine.snake[0][0])
+
+    def test_added_segment_is_to_the_right_of_head_segment(self):
+        self.move_and_add_segment(engine.LEFT)
+        self.assertGreater(self.engine.snake[1][0], self.engine.snake[0][0])
+
+    def test_added_segment_above_head_segment_is_in_the_correct_location(self):
+        self.move_and_add_segment(engine.DOWN)
+        self.assertEqual(
+            self.engine.snake[1],
+            (self.engine.snake[0][0], self.engine.snake[0][1] - 1),
+        )
+
+    def test_added_segment_below_head_segment_is_in_the_correct_location(self):
+        self.move_and_add_segment(engine.UP)
+        self.assertEqual(
+            self.engine.snake[1],
+            (self.engine.snake[0][0], self.engine.snake[0][1] + 1),
+        )
+
+    def test_added_segment_to_the_left_of_head_segment_is_in_the_correct_location(self):
+        self.move_and_add_segment(engine.RIGHT)
+        self.assertEqual(
+            self.engine.snake[1],
+            (self.engine.snake[0][0] - 1, self.engine.snake[0][1]),
+        )
+
+    def test_added_segment_to_the_right_of_head_segment_is_in_the_correct_location(
+        self,
+    ):
+        self.move_and_add_segment(engine.LEFT)
+        self.assertEqual(
+            self.engine.snake[1],
+            (self.engine.snake[0][0] + 1, self.engine.snake[0][1]),
+        )
+
+    def test_segment_is_added_to_the_tail_of_the_tail_of_head_segment(self):
+        self.move_and_add_segment(engine.UP)
+        self.move_and_add_segment(engine.UP)
+        self.assertEqual(len(self.engine.snake), 3)
+        self.assertEqual(self.engine.snake[2], (2, 2))
+
+    def test_added_segment_follows_the_body_around_a_turn(self):
+        self.move_and_add_segment(engine.UP)
+        self.move_and_add_segment(engine.LEFT)
+        self.assertEqual(list(self.engine.snake), [(1, 1), (2, 1), (2, 2)])
+
+
+class TestTurn(unittest.TestCase):
+    def setUp(self):
+        self.engine = engine.Engine()
+
+    def test_direction_is_set_when_snake_is_not_moving(self):
+        self.assertTrue(self.engine.turn(engine.LEFT))
+        self.assertEqual(self.engine.direction, engine.LEFT)
+
+    def test_direction_is_not_reversed(self):
+        self.engine.direction = engine.UP
+        self.assertFalse(self.engine.turn(engine.DOWN))
+        self.assertEqual(self.engine.direction, engine.UP)
+
+
+class TestUpdate(unittest.TestCase):
+    def setUp(self):
+        self.engine = engine.Engine()
+
+    def test_snake_does_not_move_without_a_direction(self):
+        self.engine.update()
+        self.assertEqual(self.engine.snake[0], self.engine.start_location)
+
+    def test_extender_is_placed_off_the_snake(self):
+        self.engine.update()
+        self.assertIsNotNone(self.engine.extender)
+        self.assertNotEqual(self.engine.extender, self.engine.snake[0])
+
+    def test_snake_grows_when_head_reaches_extender(self):
+        self.engine.direction = engine.RIGHT
+        self.engine.extender = (
+            self.engine.start_location[0] + 1,
+            self.engine.start_location[1],
+        )
+        self.engine.update()
+        self.assertEqual(len(self.engine.snake), 2)
+        self.assertEqual(self.engine.snake[1], self.engine.start_location)
+
+    def test_cause_of_death_is_returned_when_snake_collides_with_itself(self):
+        self.engine.set_snake([(10, 7), (10, 8), (11, 8), (11, 7), (11, 6)])
+        self.engine.direction = engine.RIGHT
+        self.engine.extender = (0, 0)
+        self.assertEqual(self.engine.update(), engine.COLLIDED_WITH_SELF)
+        self.assertEqual(list(self.engine.snake), [self.engine.start_location])
+
+    def test_cause_of_death_is_returned_when_snake_leaves_the_board(self):
+        self.engine.set_snake([(0, 0)])
+        self.engine.direction = engine.LEFT
+        self.assertEqual(self.engine.update(), engine.OUT_OF_BOUNDS)
+
+    def test_no_cause_of_death_is_returned_while_the_game_goes_on(self):
+        self.engine.direction = engine.LEFT
+        self.assertIsNone(self.engine.update())
+
+    def test_game_is_reset_when_snake_leaves_the_board(self):
+        self.engine.direction = engine.UP
+        for _ in range(self.engine.start_location[1] + 1):
+            self.engine.update()
+        self.assertEqual(self.engine.snake[0], self.engine.start_location)
+        self.assertIsNone(self.engine.direction)
+
+    def test_no_extender_is_placed_when_snake_fills_the_board(self):
+        self.engine.set_snake(
+            [
+                self.engine.cell_location(index)
+                for index in range(engine.COLUMNS * engine.ROWS)
+            ]
+        )
+        self.engine.update()
+        self.assertIsNone(self.engine.extender)
+
+
+class TestBoardSize(unittest.TestCase):
+    def test_snake_starts_in_the_middle_of_the_board(self):
+        self.assertEqual(engine.Engine(columns=9, rows=5).snake[0], (4, 2))
+
+    def test_edges_follow_the_board_size(self):
+        small = engine.Engine(columns=9, rows=5)
+        self.assertTrue(small.in_bounds((8, 4)))
+        self.assertFalse(small.in_bounds((9, 4)))
+        self.assertFalse(small.in_bounds((8, 5)))
+
+    def test_cell_indexes_follow_the_board_size(self):
+        small = engine.Engine(columns=9, rows=5)
+        self.assertEqual(small.cell_index((3, 2)), 21)
+        self.assertEqual(small.cell_location(21), (3, 2))
+
+    def test_largest_board_is_stored_sparsely(self):
+        huge = engine.Engine(seed=1, columns=10_000, rows=10_000)
+        huge.direction = engine.UP
+        huge.update()
+        self.assertEqual(len(huge.occupancy.counts), 1)
+        self.assertTrue(huge.in_bounds(huge.extender))
+        self.assertFalse(huge.occupied(huge.extender))
+
+    def test_engines_on_a_board_share_their_locations(self):
+        first, second = engine.Engine(1), engine.Engine(2)
+        first.set_snake([(3, 2), (4, 2)])
+        second.direction = engine.LEFT
+        second.set_snake([(5, 2)])
+        second.update()
+        self.assertIs(first.snake[1], second.snake[0])
+
+    def test_locations_off_the_board_are_not_shared(self):
+        edge = engine.Engine(columns=9, rows=5, start_location=(0, 0))
+        edge.direction = engine.LEFT
+        self.assertEqual(edge.update(), engine.OUT_OF_BOUNDS)
+        edge.set_snake([(-1, 0)])
+        self.assertEqual(edge.snake[0], (-1, 0))
+
+    def test_board_larger_than_the_limit_is_refused(self):
+        with self.assertRaises(ValueError):
+            engine.Engine(columns=engine.MAX_BOARD_SIZE + 1)
+        with self.assertRaises(ValueError):
+            engine.Engine(rows=0)
+
+
+class TestSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.engine = engine.Engine(3)
+        self.engine.direction = engine.LEFT
+        for _ in range(4):
+            self.engine.update()
+
+    def play(self, session, directions):
+        for direction in directions:
+            session.turn(direction)
+            session.update()
+        return list(session.snake), session.extender
+
+    def test_restored_engine_plays_on_exactly_as_before(self):
+        snapshot = self.engine.snapshot()
+        directions = [engine.UP, engine.LEFT, engine.DOWN] * 5
+        expected = self.play(self.engine, directions)
+        self.engine.restore(snapshot)
+        self.assertEqual(self.play(self.engine, directions), expected)
+
+    def test_fork_is_independent_of_the_original(self):
+        fork = engine.Engine.from_snapshot(self.engine.snapshot())
+        self.assertEqual(fork.snake, self.engine.snake)
+        fork.turn(engine.UP)
+        fork.update()
+        self.assertNotEqual(fork.snake[0], self.engine.snake[0])
+        self.assertNotIn(self.engine.cell_index(fork.snake[0]), self.engine.occupancy)
+
+    def test_snapshot_cannot_be_changed(self):
+        snapshot = self.engine.snapshot()
+        with self.assertRaises(dataclasses.FrozenInstanceError):
+            snapshot.direction = engine.UP
+        self.assertIsInstance(snapshot.cells, bytes)
+
+    def test_sparse_board_is_restored(self):
+        large = engine.Engine(3, columns=1000, rows=1000)
+        large.direction = engine.RIGHT
+        large.update()
+        snapshot = large.snapshot()
+        large.update()
+        large.restore(snapshot)
+        self.assertEqual(len(large.occupancy.counts), 1)
+        self.assertIn(large.cell_index(large.snake[0]), large.occupancy)
+
+    def test_snapshot_of_another_board_size_is_refused(self):
+        with self.assertRaises(ValueError):
+            engine.Engine(columns=10, rows=10).restore(self.engine.snapshot())
+
+    def test_engine_sharing_its_occupancy_is_refused(self):
+        shared = engine.make_occupancy(engine.COLUMNS * engine.ROWS)
+        first = engine.Engine(1, occupancy=shared, start_location=(2, 2))
+        second = engine.Engine(2, occupancy=shared, start_location=(8, 8))
+        with self.assertRaises(ValueError):
+            first.restore(self.engine.snapshot())
+        self.assertIn(second.cell_index(second.snake[0]), shared)
+
+
+class TestImport(unittest.TestCase):
+    def test_rules_are_imported_without_pygame(self):
+        loaded = subprocess.run(
+            [
+                sys.executable,
+                "-c",
+                "import sys, engine; print('pygame' in sys.modules)",
+            ],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout
+        self.assertEqual(loaded.strip(), "False")
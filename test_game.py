@@ -1,285 +1,278 @@
-import unittest
-
-import pygame
-
-import game
-
-
-class TestUpdateSnakeDirection(unittest.TestCase):
-    @classmethod
-    def setUpClass(cls):
-        cls.game = game.Game()
-
-    def test_child_segment_direction_is_set_to_head_segment_direction(self):
-        self.game.snake.append(game.Segment(pygame.Rect((0, 0), (0, 0))))
-        self.game.snake[0].direction = game.UP
-        self.game.update_snake_direction(game.DOWN)
-        self.assertEqual(self.game.snake[1].direction, game.UP)
-
-    def test_head_segment_direction_is_set_to_passed_argument(self):
-        self.game.update_snake_direction(game.LEFT)
-        self.assertEqual(self.game.snake[0].direction, game.LEFT)
-
-
-class TestMoveSegment(unittest.TestCase):
-    @classmethod
-    def setUpClass(cls):
-        cls.game = game.Game()
-
-    def setUp(self):
-        self.previous_location = self.game.snake[0].rect.topleft
-
-    def test_head_segment_moves_up_expected_distance(self):
-        self.game.snake[0].direction = game.UP
-        self.game.move_segment(self.game.snake[0])
-        self.assertEqual(
-            self.game.snake[0].rect.y, self.previous_location[1] - game.CELL_SIZE[1]
-        )
-        self.assertEqual(self.game.snake[0].rect.x, self.previous_location[0])
-
-    def test_head_segment_moves_down_expected_distance(self):
-        self.game.snake[0].direction = game.DOWN
-        self.game.move_segment(self.game.snake[0])
-        self.assertEqual(
-            self.game.snake[0].rect.y, self.previous_location[1] + game.CELL_SIZE[1]
-        )
-        self.assertEqual(self.game.snake[0].rect.x, self.previous_location[0])
-
-    def test_head_segment_moves_left_expected_distance(self):
-        self.game.snake[0].direction = game.LEFT
-        self.game.move_segment(self.game.snake[0])
-        self.assertEqual(
-            self.game.snake[0].rect.x, self.previous_location[0] - game.CELL_SIZE[0]
-        )
-        self.assertEqual(self.game.snake[0].rect.y, self.previous_location[1])
-
-    def test_head_segment_moves_right_expected_distance(self):
-        self.game.snake[0].direction = game.RIGHT
-        self.game.move_segment(self.game.snake[0])
-        self.assertEqual(
-            self.game.snake[0].rect.x, self.previous_location[0] + game.CELL_SIZE[0]
-        )
-        self.assertEqual(self.game.snake[0].rect.y, self.previous_location[1])
-
-
-class TestHeadSegmentCollidedWithExtender(unittest.TestCase):
-    @classmethod
-    def setUpClass(cls):
-        cls.game = game.Game()
-        cls.game.snake[0].rect.topleft = (32, 32)
-        cls.game.extender = pygame.Rect((0, 0), game.CELL_SIZE)
-
-    def test_returns_false_when_extender_is_not_colliding_with_head_segment(self):
-        self.game.extender.topleft = (0, 0)
-        self.assertFalse(self.game.head_segment_collided_with_extender())
-
-    def test_returns_true_when_extender_is_colliding_with_head_segment(self):
-        self.game.extender.topleft = (32, 32)
-        self.assertTrue(self.game.head_segment_collided_with_extender())
-
-
-class TestHeadSegmentCollidedWithSelf(unittest.TestCase):
-    @classmethod
-    def setUpClass(cls):
-        cls.game = game.Game()
-        cls.game.snake[0].rect.topleft = (0, 0)
-
-    def test_returns_false_when_head_segment_has_no_child_segments(self):
-        self.assertFalse(self.game.head_segment_collided_with_self())
-
-    def test_returns_false_when_head_segment_has_a_child_segment_at_another_location(
-        self,
-    ):
-        self.game.snake.append(game.Segment(pygame.Rect((32, 0), game.CELL_SIZE)))
-        self.assertFalse(self.game.head_segment_collided_with_self())
-
-    def test_returns_true_when_head_segment_has_a_child_segment_at_the_same_location(
-        self,
-    ):
-        self.game.snake.append(game.Segment(pygame.Rect((0, 0), game.CELL_SIZE)))
-        self.assertTrue(self.game.head_segment_collided_with_self())
-
-
-class TestHeadSegmentOutOfBounds(unittest.TestCase):
-    @classmethod
-    def setUpClass(cls):
-        cls.game = game.Game()
-
-    def test_returns_false_when_head_segment_is_in_bounds(self):
-        self.game.snake[0].rect.topleft = (32, 32)
-        self.assertFalse(self.game.head_segment_out_of_bounds())
-
-    def test_returns_false_when_head_segments_top_is_at_top_boundary(self):
-        self.game.snake[0].rect.topleft = (32, 0)
-        self.assertFalse(self.game.head_segment_out_of_bounds())
-
-    def test_returns_true_when_head_segment_is_past_top_boundary(self):
-        self.game.snake[0].rect.topleft = (0, -32)
-        self.assertTrue(self.game.head_segment_out_of_bounds())
-
-    def test_returns_false_when_head_segments_left_is_at_left_boundary(self):
-        self.game.snake[0].rect.topleft = (0, 32)
-        self.assertFalse(self.game.head_segment_out_of_bounds())
-
-    def test_returns_true_when_head_segment_is_past_left_boundary(self):
-        self.game.snake[0].rect.topleft = (-32, 32)
-        self.assertTrue(self.game.head_segment_out_of_bounds())
-
-    def test_return_true_when_head_segments_top_is_at_bottom_boundary(self):
-        self.game.snake[0].rect.topleft = (32, game.WINDOW_SIZE[1])
-        self.assertTrue(self.game.head_segment_out_of_bounds())
-
-    def test_returns_true_when_head_segment_is_past_bottom_boundary(self):
-        self.game.snake[0].rect.topleft = (32, game.WINDOW_SIZE[1] + 32)
-        self.assertTrue(self.game.head_segment_out_of_bounds())
-
-    def test_returns_true_when_head_segments_left_is_at_right_boundary(self):
-        self.game.snake[0].rect.topleft = (game.WINDOW_SIZE[0], 32)
-        self.assertTrue(self.game.head_segment_out_of_bounds())
-
-    def test_returns_true_when_head_segment_is_past_right_boundary(self):
-        self.game.snake[0].rect.topleft = (game.WINDOW_SIZE[0] + 32, 32)
-        self.assertTrue(self.game.head_segment_out_of_bounds())
-
-
-class TestGameOver(unittest.TestCase):
-    @classmethod
-    def setUpClass(cls):
-        cls.game = game.Game()
-        cls.game.snake.append(game.Segment(pygame.Rect((0, 0), game.CELL_SIZE)))
-
-    def setUp(self):
-        self.game.snake[0].rect.topleft = (0, 0)
-        self.game.snake[1].rect.topleft = (32, 0)
-
-    def test_returns_false_when_head_segment_did_not_go_out_of_bounds_or_collide_with_self(
-        self,
-    ):
-        self.assertFalse(self.game.game_over())
-
-    def test_returns_true_when_only_head_segment_out_of_bounds(self):
-        self.game.snake[0].rect.topleft = (-32, -32)
-        self.assertTrue(self.game.game_over())
-
-    def test_returns_true_when_only_head_segment_collided_with_self(self):
-        self.game.snake[1].rect.topleft = (0, 0)
-        self.assertTrue(self.game.game_over())
-
-    def test_returns_true_when_head_segment_out_of_bounds_and_collided_with_self(self):
-        self.game.snake[0].rect.topleft = (-32, -32)
-        self.game.snake[1].rect.topleft = (-32, -32)
-        self.assertTrue(self.game.game_over())
-
-
-class TestAddSegmentToSnake(unittest.TestCase):
-    @classmethod
-    def setUpClass(cls):
-        cls.game = game.Game()
-
-    def setUp(self):
-        self.game.snake = [game.Segment(pygame.Rect((32, 32), game.CELL_SIZE))]
-
-    def test_segment_is_added_to_snake_if_head_segment_direction_is_up(self):
-        self.game.snake[0].direction = game.UP
-        self.game.add_segment_to_snake()
-        self.assertIsInstance(self.game.snake[1], game.Segment)
-
-    def test_segment_is_added_to_snake_if_head_segment_direction_is_down(self):
-        self.game.snake[0].direction = game.DOWN
-        self.game.add_segment_to_snake()
-        self.assertIsInstance(self.game.snake[1], game.Segment)
-
-    def test_segment_is_added_to_snake_if_head_segment_direction_is_left(self):
-        self.game.snake[0].direction = game.LEFT
-        self.game.add_segment_to_snake()
-        self.assertIsInstance(self.game.snake[1], game.Segment)
-
-    def test_segment_is_added_to_snake_if_head_segment_direction_is_right(self):
-        self.game.snake[0].direction = game.RIGHT
-        self.game.add_segment_to_snake()
-        self.assertIsInstance(self.game.snake[1], game.Segment)
-
-    def test_added_segment_is_above_head_segment(self):
-        self.game.snake[0].direction = game.DOWN
-        self.game.add_segment_to_snake()
-        self.assertLess(self.game.snake[1].rect.y, self.game.snake[0].rect.y)
-
-    def test_added_segment_is_below_head_segment(self):
-        self.game.snake[0].direction = game.UP
-        self.game.add_segment_to_snake()
-        self.assertGreater(self.game.snake[1].rect.y, self.game.snake[0].rect.y)
-
-    def test_added_segment_is_to_the_left_of_head_segment(self):
-        self.game.snake[0].direction = game.RIGHT
-        self.game.add_segment_to_snake()
-        self.assertLess(self.game.snake[1].rect.x, self.game.snake[0].rect.x)
-
-    def test_added_segment_is_to_the_right_of_head_segment(self):
-        self.game.snake[0].direction = game.LEFT
-        self.game.add_segment_to_snake()
-        self.assertGreater(self.game.snake[1].rect.x, self.game.snake[0].rect.x)
-
-    def test_added_segment_above_head_segment_is_in_the_correct_location(self):
-        self.game.snake[0].direction = game.DOWN
-        self.game.add_segment_to_snake()
-        self.assertEqual(
-            self.game.snake[1].rect.y, self.game.snake[0].rect.y - game.CELL_SIZE[1]
-        )
-        self.assertEqual(self.game.snake[1].rect.x, self.game.snake[0].rect.x)
-
-    def test_added_segment_below_head_segment_is_in_the_correct_location(self):
-        self.game.snake[0].direction = game.UP
-        self.game.add_segment_to_snake()
-        self.assertEqual(
-            self.game.snake[1].rect.y, self.game.snake[0].rect.y + game.CELL_SIZE[1]
-        )
-        self.assertEqual(self.game.snake[1].rect.x, self.game.snake[0].rect.x)
-
-    def test_added_segment_to_the_left_of_head_segment_is_in_the_correct_location(self):
-        self.game.snake[0].direction = game.RIGHT
-        self.game.add_segment_to_snake()
-        self.assertEqual(
-            self.game.snake[1].rect.x, self.game.snake[0].rect.x - game.CELL_SIZE[0]
-        )
-        self.assertEqual(self.game.snake[1].rect.y, self.game.snake[0].rect.y)
-
-    def test_added_segment_to_the_right_of_head_segment_is_in_the_correct_location(
-        self,
-    ):
-        self.game.snake[0].direction = game.LEFT
-        self.game.add_segment_to_snake()
-        self.assertEqual(
-            self.game.snake[1].rect.x, self.game.snake[0].rect.x + game.CELL_SIZE[0]
-        )
-        self.assertEqual(self.game.snake[1].rect.y, self.game.snake[0].rect.y)
-
-    def test_added_segment_above_head_segment_is_the_correct_direction(self):
-        self.game.snake[0].direction = game.DOWN
-        self.game.add_segment_to_snake()
-        self.assertEqual(self.game.snake[1].direction, self.game.snake[0].direction)
-
-    def test_added_segment_below_head_segment_is_the_correct_direction(self):
-        self.game.snake[0].direction = game.UP
-        self.game.add_segment_to_snake()
-        self.assertEqual(self.game.snake[1].direction, self.game.snake[0].direction)
-
-    def test_added_segment_to_the_left_of_head_segment_is_the_correct_direction(self):
-        self.game.snake[0].direction = game.RIGHT
-        self.game.add_segment_to_snake()
-        self.assertEqual(self.game.snake[1].direction, self.game.snake[0].direction)
-
-    def test_added_segment_to_the_right_of_head_segment_is_the_correct_direction(self):
-        self.game.snake[0].direction = game.LEFT
-        self.game.add_segment_to_snake()
-        self.assertEqual(self.game.snake[1].direction, self.game.snake[0].direction)
-
-    def test_segment_is_added_to_the_tail_of_the_tail_of_head_segment(self):
-        self.game.snake[0].direction = game.UP
-        self.game.add_segment_to_snake()
-        self.game.add_segment_to_snake()
-        self.assertIsInstance(self.game.snake[2], game.Segment)
-
-    def test_added_segment_is_the_same_size_as_head_segment(self):
-        self.game.snake[0].direction = game.UP
-        self.game.add_segment_to_snake()
-        self.assertEqual(self.game.snake[1].rect.size, self.game.snake[0].rect.size)
+import os
+import unittest
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+
+import game
+import replay
+import telemetry
+
+
+class FakeInputManager:
+    def __init__(self, *commands):
+        self.commands = list(commands)
+        self.quit = False
+
+    def next_command(self, max_age=None):
+        return self.commands.pop(0) if self.commands else None
+
+    def allow_only(self, event_types):
+        pass
+
+
+class TestHandleInput(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.game = game.Game()
+
+    def setUp(self):
+        self.game.engine.reset()
+
+    def test_direction_is_set_to_queued_command(self):
+        self.game.input_manager = FakeInputManager(game.LEFT)
+        self.game.handle_input()
+        self.assertEqual(self.game.engine.direction, game.LEFT)
+
+    def test_autopilot_steers_instead_of_the_keys(self):
+        autopilot_game = game.Game(autopilot="greedy")
+        autopilot_game.input_manager = FakeInputManager(game.LEFT)
+        autopilot_game.engine.extender = (15, 7)
+        autopilot_game.handle_input()
+        self.assertEqual(autopilot_game.engine.direction, game.RIGHT)
+
+    def test_direction_is_not_reversed(self):
+        self.game.engine.direction = game.UP
+        self.game.input_manager = FakeInputManager(game.DOWN)
+        self.game.handle_input()
+        self.assertEqual(self.game.engine.direction, game.UP)
+
+    def test_commands_that_do_not_turn_the_snake_are_skipped(self):
+        self.game.engine.direction = game.UP
+        self.game.input_manager = FakeInputManager(game.DOWN, game.UP, game.RIGHT)
+        self.game.handle_input()
+        self.assertEqual(self.game.engine.direction, game.RIGHT)
+
+    def test_only_one_command_is_used_per_tick(self):
+        self.game.input_manager = FakeInputManager(game.UP, game.LEFT)
+        self.game.handle_input()
+        self.assertEqual(self.game.engine.direction, game.UP)
+        self.game.handle_input()
+        self.assertEqual(self.game.engine.direction, game.LEFT)
+
+
+class TestStartup(unittest.TestCase):
+    def test_window_is_only_opened_by_the_first_render(self):
+        lazy = game.Game(0)
+        lazy.input_manager = FakeInputManager()
+        lazy.update()
+        self.assertIsNone(lazy.displaysurf)
+        lazy.render()
+        self.assertEqual(lazy.displaysurf.get_size(), (640, 480))
+
+
+class TestUpdate(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.game = game.Game()
+
+    def test_engine_is_advanced_with_input_direction(self):
+        self.game.engine.reset()
+        previous_location = self.game.engine.snake[0]
+        self.game.input_manager = FakeInputManager(game.UP)
+        self.game.update()
+        self.assertEqual(
+            self.game.engine.snake[0],
+            (previous_location[0], previous_location[1] - 1),
+        )
+
+
+class TestAdvance(unittest.TestCase):
+    def setUp(self):
+        self.game = game.Game(0)
+        self.game.input_manager = FakeInputManager()
+        self.tick_length = 1 / game.FPS
+
+    def test_a_fast_frame_runs_no_tick(self):
+        alpha = self.game.advance(self.tick_length / 4)
+        self.assertEqual(self.game.ticks_since_render, 0)
+        self.assertAlmostEqual(alpha, 0.25)
+
+    def test_fast_frames_add_up_to_a_tick(self):
+        for _ in range(3):
+            self.game.advance(self.tick_length / 2)
+        self.assertEqual(self.game.ticks_since_render, 1)
+
+    def test_a_slow_frame_catches_up_every_tick(self):
+        alpha = self.game.advance(self.tick_length * 2.5)
+        self.assertEqual(self.game.ticks_since_render, 2)
+        self.assertAlmostEqual(alpha, 0.5)
+
+    def test_a_stall_is_clamped_and_its_backlog_dropped(self):
+        stall = self.tick_length * (game.MAX_TICKS_PER_FRAME + 10)
+        alpha = self.game.advance(stall)
+        self.assertEqual(self.game.ticks_since_render, game.MAX_TICKS_PER_FRAME)
+        self.assertEqual(alpha, 0.0)
+        self.game.advance(self.tick_length / 2)
+        self.assertEqual(self.game.ticks_since_render, game.MAX_TICKS_PER_FRAME)
+
+
+class TestSnapshots(unittest.TestCase):
+    def setUp(self):
+        self.game = game.Game(0)
+        self.game.input_manager = FakeInputManager()
+        self.game.render()
+
+    def test_restore_puts_the_snake_back_and_redraws_everything(self):
+        saved = self.game.save()
+        self.game.engine.direction = game.UP
+        self.game.update()
+        self.game.restore(saved)
+        self.assertEqual(self.game.engine.snake[0], (10, 7))
+        self.assertTrue(self.game.full_redraw)
+
+    def test_replay_still_reproduces_the_game_after_a_restore(self):
+        self.game.engine.direction = game.UP
+        for _ in range(4):
+            self.game.update()
+        saved = self.game.save()
+        self.game.engine.turn(game.LEFT)
+        for _ in range(3):
+            self.game.update()
+        self.game.restore(saved)
+        self.game.engine.turn(game.RIGHT)
+        for _ in range(3):
+            self.game.update()
+        played = replay.play(self.game.replay)
+        self.assertEqual(played.snake, self.game.engine.snake)
+        self.assertEqual(played.extender, self.game.engine.extender)
+
+    def test_restoring_a_save_of_another_game_replaces_the_replay(self):
+        other = game.Game(5)
+        other.input_manager = FakeInputManager()
+        other.engine.direction = game.DOWN
+        other.update()
+        self.game.restore(other.save())
+        self.game.update()
+        self.assertEqual(self.game.replay.seed, 5)
+        self.assertEqual(replay.play(self.game.replay).snake, self.game.engine.snake)
+
+    def test_fork_is_an_engine_the_game_does_not_draw(self):
+        fork = self.game.fork()
+        fork.direction = game.LEFT
+        fork.update()
+        self.assertEqual(self.game.engine.snake[0], (10, 7))
+
+
+class TestRender(unittest.TestCase):
+    def setUp(self):
+        self.game = game.Game()
+        self.game.input_manager = FakeInputManager()
+        self.game.engine.extender = (0, 0)
+        self.game.render()
+
+    def color_at(self, location, offset=(0, 0)):
+        left, top = self.game.cell_rect(location)[:2]
+        return self.game.displaysurf.get_at((left + offset[0], top + offset[1]))[:3]
+
+    def test_snake_and_extender_are_drawn(self):
+        head = self.game.engine.snake[0]
+        self.assertEqual(self.color_at(head), game.GREEN)
+        self.assertEqual(self.color_at((0, 0)), game.RED)
+
+    def test_moved_snake_is_redrawn_and_vacated_cell_is_erased(self):
+        previous_head = self.game.engine.snake[0]
+        self.game.engine.direction = game.RIGHT
+        self.game.update()
+        self.game.render()
+        self.assertEqual(self.color_at(self.game.engine.snake[0]), game.GREEN)
+        self.assertEqual(self.color_at(previous_head), game.BLACK)
+
+    def test_every_head_cell_since_the_last_render_is_drawn(self):
+        self.game.engine.set_snake([(10, 7), (10, 8), (10, 9)])
+        self.game.full_redraw = True
+        self.game.render()
+        self.game.engine.direction = game.UP
+        self.game.update()
+        self.game.update()
+        self.game.render()
+        self.assertEqual(self.color_at((10, 6)), game.GREEN)
+        self.assertEqual(self.color_at((10, 5)), game.GREEN)
+        self.assertEqual(self.color_at((10, 8)), game.BLACK)
+        self.assertEqual(self.color_at((10, 9)), game.BLACK)
+
+    def test_moved_extender_is_erased_and_drawn_in_its_new_cell(self):
+        self.game.engine.extender = (1, 1)
+        self.game.render()
+        self.assertEqual(self.color_at((0, 0)), game.BLACK)
+        self.assertEqual(self.color_at((1, 1)), game.RED)
+
+    def test_whole_board_is_redrawn_after_a_game_over(self):
+        self.game.engine.set_snake([(0, 7)])
+        self.game.full_redraw = True
+        self.game.render()
+        self.game.engine.direction = game.LEFT
+        self.game.update()
+        self.game.render()
+        self.assertEqual(self.color_at((0, 7)), game.BLACK)
+        self.assertEqual(self.color_at(self.game.engine.snake[0]), game.GREEN)
+
+    def test_head_is_drawn_sliding_into_its_next_cell(self):
+        head = self.game.engine.snake[0]
+        self.game.engine.direction = game.RIGHT
+        self.game.render(0.5)
+        next_cell = (head[0] + 1, head[1])
+        self.assertEqual(self.color_at(next_cell), game.GREEN)
+        self.assertEqual(
+            self.color_at(next_cell, (game.CELL_SIZE[0] - 1, 0)), game.BLACK
+        )
+
+    def test_sliding_head_is_erased_on_the_next_render(self):
+        head = self.game.engine.snake[0]
+        self.game.engine.direction = game.LEFT
+        self.game.render(0.5)
+        self.game.render()
+        self.assertEqual(
+            self.color_at((head[0] - 1, head[1]), (game.CELL_SIZE[0] - 1, 0)),
+            game.BLACK,
+        )
+
+
+class TestTelemetryOverlay(unittest.TestCase):
+    def setUp(self):
+        self.game = game.Game(telemetry=telemetry.Telemetry(1 / game.RENDER_FPS))
+        self.game.input_manager = FakeInputManager()
+
+    def test_input_handling_is_timed(self):
+        self.game.update()
+        self.assertEqual(len(self.game.telemetry.timings[telemetry.HANDLE_INPUT]), 1)
+
+    def test_each_tick_of_the_rules_is_timed_on_its_own(self):
+        for _ in range(3):
+            self.game.update()
+        self.assertEqual(len(self.game.telemetry.timings[telemetry.UPDATE]), 3)
+
+    def test_overlay_is_drawn_over_the_board(self):
+        self.game.render()
+        overlay = self.game.displaysurf.subsurface((0, 0, game.OVERLAY_WIDTH, 20))
+        self.assertIn(
+            game.GREEN,
+            [overlay.get_at((x, y))[:3] for x in range(0, 120) for y in range(20)],
+        )
+
+
+class TestTexturedRender(unittest.TestCase):
+    def test_changes_are_drawn_the_same_as_a_full_redraw(self):
+        textured = game.Game(0, textured=True)
+        textured.input_manager = FakeInputManager(game.UP, game.LEFT)
+        textured.engine.set_snake([(10, 7), (11, 7), (12, 7)])
+        textured.engine.direction = game.LEFT
+        textured.engine.extender = (0, 0)
+        textured.render()
+        textured.update()
+        textured.update()
+        textured.render()
+        drawn = pygame.image.tobytes(textured.displaysurf, "RGB")
+        textured.draw_everything()
+        self.assertEqual(pygame.image.tobytes(textured.displaysurf, "RGB"), drawn)
@@ -0,0 +1,69 @@
+import os
+import unittest
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+
+import inputmanager
+from inputmanager import InputManager
+
+
+def press(key):
+    pygame.event.post(pygame.event.Event(pygame.KEYDOWN, key=key))
+    pygame.event.post(pygame.event.Event(pygame.KEYUP, key=key))
+
+
+class TestCommandQueue(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        pygame.display.init()
+        pygame.display.set_mode((32, 32))
+
+    @classmethod
+    def tearDownClass(cls):
+        pygame.event.set_allowed(None)
+        pygame.display.quit()
+
+    def setUp(self):
+        pygame.event.clear()
+        self.input_manager = InputManager(
+            {pygame.K_UP: "up", pygame.K_LEFT: "left"}, max_commands=2
+        )
+
+    def test_keys_pressed_between_polls_are_all_queued_in_order(self):
+        press(pygame.K_UP)
+        press(pygame.K_LEFT)
+        self.input_manager.process_input()
+        self.assertEqual(self.input_manager.next_command(), "up")
+        self.assertEqual(self.input_manager.next_command(), "left")
+        self.assertIsNone(self.input_manager.next_command())
+
+    def test_keys_without_a_command_are_not_queued(self):
+        press(pygame.K_SPACE)
+        self.input_manager.process_input()
+        self.assertIsNone(self.input_manager.next_command())
+
+    def test_oldest_commands_are_dropped_when_queue_is_full(self):
+        press(pygame.K_UP)
+        press(pygame.K_UP)
+        press(pygame.K_LEFT)
+        self.input_manager.process_input()
+        self.assertEqual(self.input_manager.next_command(), "up")
+        self.assertEqual(self.input_manager.next_command(), "left")
+
+    def test_stale_commands_are_skipped(self):
+        self.input_manager._commands.append((inputmanager._milliseconds() - 1000, "up"))
+        self.assertIsNone(self.input_manager.next_command(max_age=500))
+
+    def test_fresh_commands_are_kept(self):
+        press(pygame.K_UP)
+        self.input_manager.process_input()
+        self.assertEqual(self.input_manager.next_command(max_age=500), "up")
+
+    def test_blocked_events_are_not_queued(self):
+        self.input_manager.allow_only((pygame.QUIT,))
+        press(pygame.K_UP)
+        self.input_manager.process_input()
+        pygame.event.set_allowed(None)
+        self.assertIsNone(self.input_manager.next_command())
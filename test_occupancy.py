@@ -0,0 +1,104 @@
+import random
+import unittest
+
+from occupancy import Occupancy, SparseOccupancy, make_occupancy
+
+
+class TestOccupancy(unittest.TestCase):
+    def setUp(self):
+        self.occupancy = Occupancy(4)
+
+    def test_cells_start_uncovered(self):
+        self.assertNotIn(0, self.occupancy)
+        self.assertEqual(sorted(self.occupancy.free), [0, 1, 2, 3])
+
+    def test_added_cell_is_covered_and_not_free(self):
+        self.occupancy.add(1)
+        self.assertIn(1, self.occupancy)
+        self.assertEqual(sorted(self.occupancy.free), [0, 2, 3])
+
+    def test_cell_covered_twice_stays_covered_after_one_remove(self):
+        self.occupancy.add(1)
+        self.occupancy.add(1)
+        self.occupancy.remove(1)
+        self.assertEqual(self.occupancy.count(1), 1)
+        self.assertNotIn(1, self.occupancy.free)
+
+    def test_removed_cell_is_free_again(self):
+        self.occupancy.add(3)
+        self.occupancy.add(0)
+        self.occupancy.remove(3)
+        self.assertNotIn(3, self.occupancy)
+        self.assertEqual(sorted(self.occupancy.free), [1, 2, 3])
+
+    def test_random_free_never_returns_a_covered_cell(self):
+        rng = random.Random(0)
+        for index in (0, 1, 3):
+            self.occupancy.add(index)
+        for _ in range(20):
+            self.assertEqual(self.occupancy.random_free(rng), 2)
+
+    def test_random_free_returns_none_when_board_is_full(self):
+        for index in range(4):
+            self.occupancy.add(index)
+        self.assertIsNone(self.occupancy.random_free(random.Random(0)))
+
+    def test_free_cells_can_be_reordered(self):
+        self.occupancy.add(1)
+        self.occupancy.order_free([3, 0, 2])
+        self.assertEqual(list(self.occupancy.free), [3, 0, 2])
+        self.occupancy.add(0)
+        self.assertEqual(sorted(self.occupancy.free), [2, 3])
+
+    def test_loading_a_saved_state_undoes_later_changes(self):
+        self.occupancy.add(1)
+        state = self.occupancy.save()
+        self.occupancy.add(2)
+        self.occupancy.remove(1)
+        self.occupancy.load(state)
+        self.assertIn(1, self.occupancy)
+        self.assertNotIn(2, self.occupancy)
+        self.assertEqual(list(self.occupancy.free), [0, 3, 2])
+
+    def test_reordering_must_keep_the_same_free_cells(self):
+        with self.assertRaises(ValueError):
+            self.occupancy.order_free([0, 1, 2])
+
+
+class TestSparseOccupancy(unittest.TestCase):
+    def setUp(self):
+        self.occupancy = SparseOccupancy(4)
+
+    def test_only_covered_cells_are_stored(self):
+        self.occupancy.add(1)
+        self.occupancy.add(1)
+        self.occupancy.add(2)
+        self.assertEqual(self.occupancy.counts, {1: 2, 2: 1})
+
+    def test_removed_cell_is_forgotten(self):
+        self.occupancy.add(1)
+        self.occupancy.add(1)
+        self.occupancy.remove(1)
+        self.assertEqual(self.occupancy.count(1), 1)
+        self.occupancy.remove(1)
+        self.assertNotIn(1, self.occupancy)
+        self.assertEqual(self.occupancy.counts, {})
+
+    def test_random_free_never_returns_a_covered_cell(self):
+        rng = random.Random(0)
+        self.occupancy.add(0)
+        for _ in range(20):
+            self.assertNotEqual(self.occupancy.random_free(rng), 0)
+        for index in (1, 3):
+            self.occupancy.add(index)
+        for _ in range(20):
+            self.assertEqual(self.occupancy.random_free(rng), 2)
+
+    def test_random_free_returns_none_when_board_is_full(self):
+        for index in range(4):
+            self.occupancy.add(index)
+        self.assertIsNone(self.occupancy.random_free(random.Random(0)))
+
+    def test_large_boards_are_sparse(self):
+        self.assertIsInstance(make_occupancy(20 * 15), Occupancy)
+        self.assertIsInstance(make_occupancy(10_000 * 10_000), SparseOccupancy)
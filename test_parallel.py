@@ -0,0 +1,33 @@
+import unittest
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+if numpy is not None:
+    import batch
+    import parallel
+
+
+@unittest.skipIf(numpy is None, "numpy is not installed")
+class TestParallelRunner(unittest.TestCase):
+    def setUp(self):
+        self.runner = parallel.ParallelRunner(5, 2, columns=6, rows=5, seed=0)
+
+    def tearDown(self):
+        self.runner.close()
+
+    def test_step_writes_every_games_observation_to_shared_memory(self):
+        observations, rewards, dones = self.runner.step([0, 1, 2, 3, batch.NO_ACTION])
+        self.assertEqual(observations.shape, (5, 5, 6))
+        self.assertEqual((observations == batch.HEAD).sum(), 5)
+        self.assertEqual(observations[4, 2, 3], batch.HEAD)
+        self.assertEqual(rewards.shape, (5,))
+        self.assertEqual(dones.shape, (5,))
+
+    def test_run_reports_steps_per_second_for_each_worker(self):
+        self.runner.run(10)
+        rates = self.runner.steps_per_second()
+        self.assertEqual(len(rates), 2)
+        self.assertTrue(all(rate > 0 for rate in rates))
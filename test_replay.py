@@ -0,0 +1,71 @@
+import unittest
+
+import engine
+import replay
+
+
+def record_session(seed, directions):
+    session = engine.Engine(seed)
+    recording = replay.Replay(seed)
+    for direction in directions:
+        if direction is not None:
+            session.turn(direction)
+        recording.record(session)
+        session.update()
+    return session, recording
+
+
+DIRECTIONS = [None, engine.UP, None, engine.LEFT, None, None, engine.DOWN] * 20
+
+
+class TestEngineSeed(unittest.TestCase):
+    def test_same_seed_places_the_same_extenders(self):
+        first = engine.Engine(7)
+        second = engine.Engine(7)
+        first.update()
+        second.update()
+        self.assertEqual(first.extender, second.extender)
+
+    def test_seed_is_chosen_when_not_given(self):
+        self.assertIsInstance(engine.Engine().seed, int)
+
+
+class TestReplay(unittest.TestCase):
+    def test_one_byte_is_recorded_per_tick(self):
+        _, recording = record_session(3, DIRECTIONS)
+        self.assertEqual(
+            len(recording.to_bytes()), replay.HEADER.size + len(DIRECTIONS)
+        )
+
+    def test_replay_survives_a_round_trip_through_bytes(self):
+        _, recording = record_session(3, DIRECTIONS)
+        (decoded,) = replay.read_replays(recording.to_bytes())
+        self.assertEqual(decoded, recording)
+
+    def test_concatenated_replays_are_read_in_order(self):
+        _, first = record_session(1, DIRECTIONS)
+        _, second = record_session(2, DIRECTIONS[:5])
+        decoded = list(replay.read_replays(first.to_bytes() + second.to_bytes()))
+        self.assertEqual(decoded, [first, second])
+
+    def test_truncated_replay_is_rejected(self):
+        _, recording = record_session(3, DIRECTIONS)
+        with self.assertRaises(replay.ReplayError):
+            list(replay.read_replays(recording.to_bytes()[:-1]))
+
+    def test_bad_magic_is_rejected(self):
+        with self.assertRaises(replay.ReplayError):
+            list(replay.read_replays(b"\0" * replay.HEADER.size))
+
+    def test_unknown_direction_code_is_rejected(self):
+        _, recording = record_session(3, DIRECTIONS)
+        recording.ticks[5] = len(replay.DIRECTIONS) + 4
+        with self.assertRaises(replay.ReplayError):
+            list(replay.read_replays(recording.to_bytes()))
+
+    def test_playback_reproduces_the_recorded_session(self):
+        session, recording = record_session(11, DIRECTIONS)
+        played = replay.play(recording)
+        self.assertEqual(played.snake, session.snake)
+        self.assertEqual(played.extender, session.extender)
+        self.assertEqual(played.direction, session.direction)
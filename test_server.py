@@ -0,0 +1,138 @@
+import json
+import asyncio
+import unittest
+
+import engine
+import server
+
+
+class TestArena(unittest.TestCase):
+    def setUp(self):
+        self.arena = server.Arena(max_snakes=2, seed=0)
+
+    def test_snakes_join_free_slots_until_the_arena_is_full(self):
+        self.assertEqual(self.arena.join(), 0)
+        self.assertEqual(self.arena.join(), 1)
+        self.assertIsNone(self.arena.join())
+
+    def test_snakes_start_in_different_cells(self):
+        self.arena.join()
+        self.arena.join()
+        self.assertNotEqual(
+            self.arena.snakes[0].snake[0], self.arena.snakes[1].snake[0]
+        )
+
+    def test_leaving_frees_the_snakes_cells(self):
+        slot = self.arena.join()
+        location = self.arena.snakes[slot].snake[0]
+        index = self.arena.snakes[slot].cell_index(location)
+        self.arena.leave(slot)
+        self.assertNotIn(index, self.arena.occupancy)
+        self.assertEqual(self.arena.join(), slot)
+
+    def test_one_queued_command_is_used_per_tick(self):
+        slot = self.arena.join()
+        self.arena.command(slot, engine.UP)
+        self.arena.command(slot, engine.LEFT)
+        self.arena.tick()
+        self.assertEqual(self.arena.snakes[slot].direction, engine.UP)
+        self.arena.tick()
+        self.assertEqual(self.arena.snakes[slot].direction, engine.LEFT)
+
+    def test_snake_running_into_another_snake_is_reset(self):
+        first = self.arena.join()
+        second = self.arena.join()
+        target = self.arena.snakes[second].snake[0]
+        self.arena.snakes[first].set_snake([(target[0] - 1, target[1])])
+        self.arena.snakes[first].extender = (0, 0)
+        self.arena.snakes[second].extender = (0, 0)
+        self.arena.command(first, engine.RIGHT)
+        self.arena.tick()
+        self.assertEqual(
+            list(self.arena.snakes[first].snake), [self.arena.start_locations[first]]
+        )
+        self.assertEqual(list(self.arena.snakes[second].snake), [target])
+
+    def test_snake_waits_off_the_board_until_its_start_cell_is_free(self):
+        first = self.arena.join()
+        second = self.arena.join()
+        start = self.arena.start_locations[first]
+        blocker = self.arena.snakes[second]
+        blocker.set_snake([(start[0] + offset, start[1]) for offset in range(-2, 3)])
+        blocker.direction = engine.DOWN
+        blocker.extender = (0, 0)
+        self.arena.snakes[first].set_snake([(start[0], start[1] - 1)])
+        self.arena.snakes[first].extender = (0, 0)
+        self.arena.command(first, engine.DOWN)
+        self.arena.tick()
+        self.assertEqual(list(self.arena.snakes[first].snake), [])
+        index = blocker.cell_index(start)
+        self.assertEqual(self.arena.occupancy.count(index), 1)
+        for _ in range(3):
+            self.arena.tick()
+            self.assertLessEqual(self.arena.occupancy.count(index), 1)
+        self.assertEqual(list(self.arena.snakes[first].snake), [start])
+
+
+class TestServer(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.server = server.Server(3, max_snakes=1, tick_rate=100, seed=0)
+        self.asyncio_server = await self.server.serve()
+        self.port = self.asyncio_server.sockets[0].getsockname()[1]
+
+    async def asyncTearDown(self):
+        self.server.ticker.cancel()
+        self.asyncio_server.close()
+        await self.asyncio_server.wait_closed()
+
+    async def connect(self):
+        reader, writer = await asyncio.open_connection("127.0.0.1", self.port)
+        self.addAsyncCleanup(self.close, writer)
+        return reader, writer
+
+    async def close(self, writer):
+        writer.close()
+        await writer.wait_closed()
+
+    async def test_joined_client_steers_its_snake_and_receives_states(self):
+        reader, writer = await self.connect()
+        writer.write(b"join 2\n")
+        self.assertEqual(await reader.readline(), b"joined 2 0\n")
+        writer.write(b"up\n")
+        start = self.server.arenas[2].start_locations[0]
+        for _ in range(50):
+            state = json.loads(await reader.readline())
+            if state["snakes"]["0"][0] != list(start):
+                break
+        self.assertEqual(state["snakes"]["0"][0], [start[0], start[1] - 1])
+
+    async def test_second_client_cannot_join_a_full_arena(self):
+        reader, writer = await self.connect()
+        writer.write(b"join 0\n")
+        await reader.readline()
+        other_reader, other_writer = await self.connect()
+        other_writer.write(b"join 0\n")
+        self.assertEqual(await other_reader.readline(), b"error arena is full\n")
+
+    async def test_spectator_receives_states_without_a_snake(self):
+        reader, writer = await self.connect()
+        writer.write(b"watch 1\n")
+        state = json.loads(await reader.readline())
+        self.assertEqual(state["snakes"], {})
+
+    async def test_unknown_arena_is_rejected(self):
+        reader, writer = await self.connect()
+        writer.write(b"join 9\n")
+        self.assertEqual(await reader.readline(), b"error no such arena\n")
+
+    async def test_snake_leaves_when_its_client_disconnects(self):
+        reader, writer = await self.connect()
+        writer.write(b"join 0\n")
+        await reader.readline()
+        writer.close()
+        await writer.wait_closed()
+        for _ in range(50):
+            if not self.server.arenas[0].snakes:
+                break
+            await asyncio.sleep(0.01)
+        self.assertEqual(self.server.arenas[0].snakes, {})
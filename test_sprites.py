@@ -0,0 +1,63 @@
+import os
+import unittest
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+
+import sprites
+from engine import DOWN, LEFT, RIGHT, UP
+
+
+class TestSegmentKey(unittest.TestCase):
+    def setUp(self):
+        self.snake = [(1, 1), (2, 1), (2, 2), (2, 3)]
+
+    def test_head_joins_the_segment_behind_it(self):
+        self.assertEqual(
+            sprites.segment_key(self.snake, 0), (sprites.HEAD, frozenset({RIGHT}))
+        )
+
+    def test_bend_joins_both_neighbours(self):
+        self.assertEqual(
+            sprites.segment_key(self.snake, 1), (sprites.BODY, frozenset({LEFT, DOWN}))
+        )
+
+    def test_straight_body_joins_opposite_sides(self):
+        self.assertEqual(
+            sprites.segment_key(self.snake, 2), (sprites.BODY, frozenset({UP, DOWN}))
+        )
+
+    def test_tail_joins_the_segment_in_front_of_it(self):
+        self.assertEqual(
+            sprites.segment_key(self.snake, 3), (sprites.TAIL, frozenset({UP}))
+        )
+
+    def test_lone_head_joins_nothing(self):
+        self.assertEqual(sprites.segment_key([(1, 1)], 0), (sprites.HEAD, frozenset()))
+
+
+class TestMakeSprites(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        pygame.display.init()
+        cls.display = pygame.display.set_mode((64, 64))
+
+    def test_every_segment_key_has_a_converted_sprite(self):
+        made = sprites.make_sprites((16, 16), textured=True)
+        snake = [(1, 1), (2, 1), (2, 2), (2, 3)]
+        for index in range(len(snake)):
+            sprite = made[sprites.segment_key(snake, index)]
+            self.assertEqual(sprite.get_size(), (16, 16))
+            self.assertEqual(sprite.get_bitsize(), self.display.get_bitsize())
+
+    def test_plain_segments_fill_the_cell(self):
+        made = sprites.make_sprites((16, 16))
+        sprite = made[sprites.BODY, frozenset({UP, DOWN})]
+        self.assertEqual(sprite.get_at((0, 0))[:3], sprites.GREEN)
+
+    def test_textured_segments_join_only_their_neighbours(self):
+        made = sprites.make_sprites((16, 16), textured=True)
+        sprite = made[sprites.BODY, frozenset({UP, DOWN})]
+        self.assertEqual(sprite.get_at((8, 0))[:3], sprites.GREEN)
+        self.assertEqual(sprite.get_at((0, 8))[:3], sprites.BLACK)
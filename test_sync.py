@@ -0,0 +1,119 @@
+import random
+import unittest
+
+import engine
+import sync
+
+
+def assert_same_state(test, decoded, original):
+    test.assertEqual(decoded.snake, original.snake)
+    test.assertEqual(decoded.extender, original.extender)
+    test.assertEqual(decoded.direction, original.direction)
+    test.assertEqual(decoded.vacated, original.vacated)
+    test.assertEqual(decoded.start_location, original.start_location)
+    test.assertEqual(sorted(decoded.occupancy.free), sorted(original.occupancy.free))
+
+
+def steer_towards_extender(session, rng):
+    if session.extender is None or rng.random() < 0.1:
+        session.turn(rng.choice((engine.UP, engine.DOWN, engine.LEFT, engine.RIGHT)))
+        return
+    (x, y), (extender_x, extender_y) = session.snake[0], session.extender
+    if extender_x != x:
+        session.turn(engine.LEFT if extender_x < x else engine.RIGHT)
+    else:
+        session.turn(engine.UP if extender_y < y else engine.DOWN)
+
+
+class TestKeyframe(unittest.TestCase):
+    def setUp(self):
+        self.engine = engine.Engine(4)
+        self.engine.set_snake([(2, 2), (2, 3), (3, 3)])
+        self.engine.direction = engine.UP
+        self.engine.extender = (0, 0)
+
+    def test_keyframe_decodes_into_an_identical_engine(self):
+        decoded = sync.decode(sync.encode_keyframe(self.engine))
+        assert_same_state(self, decoded, self.engine)
+
+    def test_keyframe_with_rng_state_places_the_same_extenders(self):
+        for _ in range(30):
+            self.engine.extender = None
+            self.engine.update()
+        decoded = sync.decode(sync.encode_keyframe(self.engine, include_rng=True))
+        for _ in range(20):
+            self.engine.extender = decoded.extender = None
+            self.engine.update()
+            decoded.update()
+            self.assertEqual(decoded.extender, self.engine.extender)
+
+    def test_keyframe_keeps_the_board_size(self):
+        large = engine.Engine(5, columns=3000, rows=2000)
+        large.set_snake([(2999, 0), (2998, 0)])
+        large.update()
+        decoded = sync.decode(sync.encode_keyframe(large, include_rng=True))
+        self.assertEqual((decoded.columns, decoded.rows), (3000, 2000))
+        self.assertEqual(decoded.snake, large.snake)
+        large.extender = decoded.extender = None
+        large.update()
+        decoded.update()
+        self.assertEqual(decoded.extender, large.extender)
+
+    def test_unsupported_version_is_rejected(self):
+        message = sync.encode_keyframe(self.engine)
+        with self.assertRaises(sync.SyncError):
+            sync.decode(bytes([(sync.VERSION + 1) << 4 | sync.KEYFRAME]) + message[1:])
+
+    def test_truncated_message_is_rejected(self):
+        with self.assertRaises(sync.SyncError):
+            sync.decode(sync.encode_keyframe(self.engine)[:-1])
+
+    def test_corrupt_keyframe_is_rejected(self):
+        small = engine.Engine(4, columns=6, rows=4)
+        # Header, flags, seed, columns, rows, start cell, then the direction,
+        # each one byte on this board.
+        for offset, value in ((5, 24), (6, 9)):
+            message = bytearray(sync.encode_keyframe(small))
+            message[offset] = value
+            with self.assertRaises(sync.SyncError):
+                sync.decode(bytes(message))
+
+    def test_corrupt_delta_is_rejected(self):
+        for message in (
+            bytes([0x22, sync.DIRECTION_CHANGED, 9]),
+            bytes([0x22, sync.EXTENDER_CHANGED, 0xFF, 0x7F]),
+        ):
+            with self.assertRaises(sync.SyncError):
+                sync.decode(message, self.engine)
+
+
+class TestDeltaEncoder(unittest.TestCase):
+    def test_deltas_keep_a_decoded_engine_in_step(self):
+        session = engine.Engine(9)
+        encoder = sync.DeltaEncoder(session, keyframe_interval=50)
+        rng = random.Random(0)
+        decoded = sync.decode(encoder.encode())
+        longest = 0
+        for _ in range(2000):
+            steer_towards_extender(session, rng)
+            session.update()
+            decoded = sync.decode(encoder.encode(), decoded)
+            assert_same_state(self, decoded, session)
+            longest = max(longest, len(session.snake))
+        self.assertGreater(longest, 5)
+
+    def test_a_plain_move_costs_two_bytes(self):
+        session = engine.Engine(9)
+        session.extender = (0, 0)
+        session.direction = engine.UP
+        encoder = sync.DeltaEncoder(session)
+        encoder.encode()
+        session.update()
+        self.assertEqual(len(encoder.encode()), 2)
+
+    def test_keyframe_is_sent_after_a_reset(self):
+        session = engine.Engine(9)
+        encoder = sync.DeltaEncoder(session)
+        encoder.encode()
+        session.reset()
+        self.assertEqual(encoder.encode()[0] & 0x0F, sync.KEYFRAME)
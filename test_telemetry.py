@@ -0,0 +1,60 @@
+import os
+import csv
+import json
+import tempfile
+import unittest
+
+import telemetry
+
+
+class TestTelemetry(unittest.TestCase):
+    def setUp(self):
+        self.telemetry = telemetry.Telemetry(frame_budget=0.01, window=100)
+
+    def test_percentiles_cover_only_the_latest_window(self):
+        for milliseconds in range(1000):
+            self.telemetry.record(telemetry.RENDER, milliseconds / 1000)
+        summary = self.telemetry.summary()
+        self.assertAlmostEqual(summary["render_p50_ms"], 950)
+        self.assertAlmostEqual(summary["render_p99_ms"], 999)
+
+    def test_frames_over_budget_are_counted_as_missed(self):
+        self.telemetry.end_frame(0.005)
+        self.telemetry.end_frame(0.02)
+        self.assertEqual(self.telemetry.frames, 2)
+        self.assertEqual(self.telemetry.missed_deadlines, 1)
+
+    def test_timed_function_records_each_call(self):
+        timed = self.telemetry.timed(telemetry.HANDLE_INPUT, lambda value: value * 2)
+        self.assertEqual(timed(3), 6)
+        self.assertEqual(len(self.telemetry.timings[telemetry.HANDLE_INPUT]), 1)
+
+    def test_overlay_has_a_line_per_phase_and_one_for_deadlines(self):
+        self.assertEqual(len(self.telemetry.lines()), len(telemetry.PHASES) + 1)
+
+
+class TestExport(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def export_twice(self, name):
+        path = os.path.join(self.directory.name, name)
+        session = telemetry.Telemetry(0.01, export_path=path, export_interval=0)
+        session.record(telemetry.UPDATE, 0.002)
+        session.end_frame(0.002)
+        session.end_frame(0.002)
+        return path
+
+    def test_summaries_are_appended_as_json_lines(self):
+        with open(self.export_twice("telemetry.jsonl")) as export_file:
+            rows = [json.loads(line) for line in export_file]
+        self.assertEqual([row["frames"] for row in rows], [1, 2])
+        self.assertAlmostEqual(rows[0]["update_p50_ms"], 2)
+
+    def test_summaries_are_appended_as_csv_rows_under_one_header(self):
+        with open(self.export_twice("telemetry.csv"), newline="") as export_file:
+            rows = list(csv.DictReader(export_file))
+        self.assertEqual([row["frames"] for row in rows], ["1", "2"])